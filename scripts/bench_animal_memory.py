@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory and attribute access benchmark for animal objects.
+
+Compares the slotted Herbivore with an object using the previous layout, where age,
+weight, fitness, can_migrate, has_migrated and dead lived in a per-instance __dict__.
+"""
+
+import time
+import tracemalloc
+
+from biosim.animals import Herbivore, DEAD
+
+N_ANIMALS = 200000
+
+
+class DictHerbivore:
+    """Herbivore state stored in a per-instance __dict__, as before __slots__."""
+
+    def __init__(self, age, weight):
+        self.age = age
+        self.weight = weight
+        self.fitness = 0.5
+        self.can_migrate = False
+        self.has_migrated = False
+        self.dead = False
+
+
+def bytes_per_animal(factory):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    animals = [factory(5, 20.5) for _ in range(N_ANIMALS)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return animals, (end - start) / N_ANIMALS
+
+
+def access_time(animals, is_alive):
+    start = time.perf_counter()
+    for animal in animals:
+        animal.weight -= animal.weight * 0.05
+        animal.age += 1
+        is_alive(animal)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    dict_animals, dict_bytes = bytes_per_animal(DictHerbivore)
+    slot_animals, slot_bytes = bytes_per_animal(Herbivore)
+    print('Bytes per animal: before {:.0f}, after {:.0f}'.format(dict_bytes, slot_bytes))
+
+    dict_time = access_time(dict_animals, lambda animal: not animal.dead)
+    slot_time = access_time(slot_animals, lambda animal: not animal.flags & DEAD)
+    print('Hot loop over {} animals: before {:.3f} s, after {:.3f} s'.format(
+        N_ANIMALS, dict_time, slot_time))
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Throughput and peak resident memory of the columnar engine against the memory-mapped
+engine for a large herbivore population.
+
+Every configuration runs in its own process, so that the peak resident set size reported
+by the operating system belongs to that configuration alone.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from biosim.columnar import ColumnarIsland
+from biosim.mapped import MappedIsland
+
+N_ANIMALS = 4000000
+N_YEARS = 3
+GEOGRAPHY = "WWWWWWW\nWLLLLLW\nWLLLLLW\nWLLLLLW\nWWWWWWW"
+CONFIGURATIONS = {'columnar': (None, None),
+                  'mapped, 2^16 chunk': ('mapped', 1 << 16),
+                  'mapped, 2^18 chunk': ('mapped', 1 << 18),
+                  'mapped, 2^20 chunk': ('mapped', 1 << 20)}
+
+
+def run(engine, chunk_size):
+    if engine == 'mapped':
+        island = MappedIsland(GEOGRAPHY, seed=1, chunk_size=chunk_size)
+    else:
+        island = ColumnarIsland(GEOGRAPHY, seed=1)
+    island.update_cell_params('L', {'f_max': 1e9})
+    island.reset_fodder()
+    store = island.populations['Herbivore']
+    rng = np.random.default_rng(1)
+    for start in range(0, N_ANIMALS, 1 << 18):
+        size = min(1 << 18, N_ANIMALS - start)
+        store.append(rng.integers(0, len(island.habitable), size),
+                     rng.integers(1, 10, size), rng.uniform(20, 40, size))
+    store.sort_by_cell()
+    animal_years = 0
+    start = time.perf_counter()
+    for _ in range(N_YEARS):
+        animal_years += len(store)
+        island.commence_annual_cycle()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print('{:.0f} {:.0f}'.format(animal_years / elapsed, peak))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        run(sys.argv[1], int(sys.argv[2]) if sys.argv[2] != 'None' else None)
+        sys.exit()
+    print('{} herbivores, {} years'.format(N_ANIMALS, N_YEARS))
+    print('{:<20} {:>18} {:>14}'.format('engine', 'animal-years / s', 'peak RSS, MB'))
+    for label, (engine, chunk_size) in CONFIGURATIONS.items():
+        output = subprocess.run([sys.executable, __file__, str(engine), str(chunk_size)],
+                                capture_output=True, text=True, check=True).stdout
+        throughput, peak = output.split()
+        print('{:<20} {:>18} {:>14}'.format(label, throughput, peak))
@@ -8,6 +8,36 @@ their respective characteristics and functions such as the way each type of anim
 
 import math
 import random
+from bisect import bisect_left
+from collections import namedtuple
+import numpy as np
+
+#: Bit of **Animals.flags** set when the animal dies.
+DEAD = 1
+#: Bit of **Animals.flags** set when the animal is likely to migrate.
+CAN_MIGRATE = 2
+
+
+#: Immutable per-species parameters read by the hot paths: every key of *guideline_params*
+#: plus the derived constants ``birth_weight_threshold = zeta * (w_birth + sigma_birth)``
+#: and ``inv_delta_phi_max = 1 / DeltaPhiMax`` (*None* if *DeltaPhiMax* is *None*).
+SpeciesParams = namedtuple('SpeciesParams',
+                           ['w_birth', 'sigma_birth', 'beta', 'eta', 'a_half', 'phi_age',
+                            'w_half', 'phi_weight', 'mu', 'gamma', 'zeta', 'xi', 'omega', 'F',
+                            'DeltaPhiMax', 'birth_weight_threshold', 'inv_delta_phi_max'])
+
+
+def _flag_property(bit, doc):
+    def getter(self):
+        return self.flags & bit != 0
+
+    def setter(self, value):
+        if value:
+            self.flags |= bit
+        else:
+            self.flags &= ~bit
+
+    return property(getter, setter, doc=doc)
 
 
 class Animals:
@@ -32,7 +62,9 @@ class Animals:
         |
 
     fitness
-        *float*: Fitness of the animal.
+        *float*: Fitness of the animal. Computed lazily: changes to age or weight made by
+        the animal's own methods only mark it as stale, and it is recomputed with
+        **calculate_fitness()** the next time it is read.
 
         |
 
@@ -41,21 +73,122 @@ class Animals:
 
         |
 
-    has_migrated
-        *bool*: *True* if animal has migrated to another cell, *False* otherwise.
-        Cannot be *True* if **can_migrate** is *False*.
+    params
+        *SpeciesParams*: Parameters of the species compiled from *guideline_params* by
+        **compile_params()**. Change them through **update_defaults()**.
 
         |
 
+    flags
+        *int*: Bit field holding **dead** and **can_migrate**, see the module constants
+        *DEAD* and *CAN_MIGRATE*.
+
+        |
+
+    weight_table_step
+        *float*: Grid step of the interpolated weight sigmoid used by fitness, or *None*
+        (default) to evaluate it exactly. Set per species with **set_weight_table()**.
+
+        |
+
+    random
+        Source of random numbers of the species, the :mod:`random` module by default.
+        Species derived for a simulation with **derive()** get their own generator.
+
+        |
+
+    pool
+        *AnimalPool*: Pool that newborns of the species are taken from, or *None*
+        (default) to always create new objects.
+
+        |
+
+    Animals store their state in ``__slots__`` instead of a per-instance ``__dict__``.
+
     """
 
+    __slots__ = ('age', 'weight', '_fitness', 'flags')
+
+    dead = _flag_property(DEAD, "*True* if the animal dies.")
+    can_migrate = _flag_property(CAN_MIGRATE, "*True* if the animal is likely to migrate.")
+
+    random = random
+    pool = None
+    weight_table_step = None
+    _age_table = None
+    _age_array = None
+    _weight_table = None
+
     def __init__(self, age, weight):
         self.age = age
         self.weight = weight
-        self.calculate_fitness()
-        self.can_migrate = False
-        self.has_migrated = False
-        self.dead = False
+        self._fitness = None
+        self.flags = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile_params()
+
+    @classmethod
+    def derive(cls, random_source=None):
+        """
+        Returns a subclass of the species with its own copy of the current
+        *guideline_params*, so that a simulation can change its parameters without
+        affecting other simulations or the module-level defaults.
+
+        Parameters
+        ----------
+        random_source : random.Random
+            Generator used by animals of the derived species. If *None*, the parent's
+            source is used.
+
+
+        .. code-block:: python
+
+            MyHerbivore = Herbivore.derive(random.Random(12345))
+            MyHerbivore.update_defaults({'zeta': 3.2})
+
+
+        |
+
+        """
+        attributes = {'__slots__': (), '__module__': cls.__module__,
+                      'guideline_params': dict(cls.guideline_params)}
+        if random_source is not None:
+            attributes['random'] = random_source
+        return type(cls.__name__, (cls,), attributes)
+
+    @classmethod
+    def create(cls, age, weight):
+        """
+        Returns a new animal of the species, recycled from **pool** if the species has one.
+
+        .. seealso::
+            - AnimalPool.acquire()
+
+        |
+
+        """
+        if cls.pool is None:
+            return cls(age, weight)
+        return cls.pool.acquire(age, weight)
+
+    @property
+    def fitness(self):
+        """
+        Fitness of the animal, recomputed only if age or weight changed since it was
+        last computed.
+
+        |
+
+        """
+        if self._fitness is None:
+            self.calculate_fitness()
+        return self._fitness
+
+    @fitness.setter
+    def fitness(self, value):
+        self._fitness = value
 
     @classmethod
     def update_defaults(cls, params):
@@ -93,6 +226,185 @@ class Animals:
             if value < 0:
                 raise ValueError('All parameter values must be >= zero')
         cls.guideline_params.update(params)
+        cls.compile_params()
+
+    @classmethod
+    def compile_params(cls):
+        """
+        Compile *guideline_params* into the immutable **params** struct, including the
+        derived constants, and drop the fitness tables so they are rebuilt from the new
+        values.
+
+        .. seealso::
+            - SpeciesParams
+
+        |
+
+        """
+        p = cls.guideline_params
+        dpm = p['DeltaPhiMax']
+        cls.params = SpeciesParams(birth_weight_threshold=p['zeta'] * (p['w_birth'] +
+                                                                       p['sigma_birth']),
+                                   inv_delta_phi_max=None if dpm is None else 1 / dpm,
+                                   **p)
+        cls._age_table = None
+        cls._age_array = None
+        cls._weight_table = None
+
+    @classmethod
+    def build_age_table(cls, max_age):
+        """
+        Build the table of the age factor of fitness:
+            .. math::
+                q^{+}(a,a_{\\frac{1}{2}},\\phi_{age}) =
+                \\frac{1}{1 + e^{\\phi_{age}(a-a_\\frac{1}{2})}}
+
+        for every integer age from 0 to at least **max_age**, but no further than
+        **age_table_limit()**, past which the factor no longer changes. The table is kept
+        on the species class and rebuilt only when it is too short or after the
+        parameters change.
+
+        Parameters
+        ----------
+        max_age : int
+            Highest age the table must cover.
+
+
+        |
+
+        """
+        size = min(max(int(max_age) + 1, 2 * len(cls._age_table or ())),
+                   cls.age_table_limit())
+        size = max(size, 64)
+        phi_age = cls.params.phi_age
+        a_half = cls.params.a_half
+        table = []
+        for age in range(size):
+            try:
+                table.append(1 / (1 + math.exp(phi_age * (age - a_half))))
+            except OverflowError:
+                table.append(0.)
+        cls._age_table = table
+        cls._age_array = np.array(table)
+        return table
+
+    @classmethod
+    def age_table_limit(cls):
+        """
+        Returns the number of entries of a full age table. From age
+        :math:`a_{\\frac{1}{2}} + 746 / |\\phi_{age}|` on, the age factor is exactly 0
+        (or 1 for a negative :math:`\\phi_{age}`) in double precision, so older animals
+        use the last entry.
+
+        |
+
+        """
+        phi_age = abs(cls.params.phi_age)
+        if phi_age == 0:
+            return 1
+        return max(math.ceil(cls.params.a_half + 746 / phi_age), 0) + 1
+
+    @classmethod
+    def age_factor(cls, age):
+        """
+        Returns the age factor of fitness, looked up in the age table for integer ages.
+
+        .. seealso::
+            - Animals.build_age_table()
+
+        |
+
+        """
+        if type(age) is int and age >= 0:
+            table = cls._age_table
+            if table is None or (age >= len(table) and len(table) < cls.age_table_limit()):
+                table = cls.build_age_table(age)
+            return table[min(age, len(table) - 1)]
+        return 1 / (1 + math.exp(cls.params.phi_age * (age - cls.params.a_half)))
+
+    @classmethod
+    def set_weight_table(cls, step):
+        """
+        Use a linearly interpolated table for the weight factor of fitness:
+            .. math::
+                q^{-}(w,w_{\\frac{1}{2}},\\phi_{weight}) =
+                \\frac{1}{1 + e^{-\\phi_{weight}(w-w_\\frac{1}{2})}}
+
+        The table spans :math:`w_{\\frac{1}{2}} \\pm 40 / \\phi_{weight}`, beyond which the
+        sigmoid is within :math:`10^{-17}` of 0 or 1. The error is bounded by
+        **weight_table_error_bound()**.
+
+        Parameters
+        ----------
+        step : float
+            Grid step of the table, or *None* to evaluate the sigmoid exactly.
+
+
+        .. code-block:: python
+
+            Herbivore.set_weight_table(0.05)
+
+
+        |
+
+        """
+        if step is not None and (type(step) not in (int, float) or step <= 0):
+            raise ValueError('Weight table step must be a positive number or None')
+        cls.weight_table_step = step
+        cls._weight_table = None
+
+    @classmethod
+    def weight_table_error_bound(cls):
+        """
+        Returns the maximum absolute error of the interpolated weight factor: the linear
+        interpolation bound :math:`h^2 \\max|q''| / 8` with
+        :math:`\\max|q''| = \\phi_{weight}^2 / (6 \\sqrt{3})`, plus the error of clamping
+        outside the table. Returns 0 if the table is disabled.
+
+        |
+
+        """
+        if cls.weight_table_step is None:
+            return 0.
+        phi_weight = cls.params.phi_weight
+        return cls.weight_table_step ** 2 * phi_weight ** 2 / (48 * math.sqrt(3)) + 1e-17
+
+    @classmethod
+    def _build_weight_table(cls):
+        phi_weight = cls.params.phi_weight
+        w_half = cls.params.w_half
+        span = 40 / phi_weight if phi_weight > 0 else 0.
+        n_steps = max(1, math.ceil(2 * span / cls.weight_table_step))
+        w_min = w_half - span
+        step = 2 * span / n_steps if span > 0 else 1.
+        values = []
+        for index in range(n_steps + 1):
+            values.append(1 / (1 + math.exp(-phi_weight * (w_min + index * step - w_half))))
+        cls._weight_table = (w_min, step, values, np.array(values))
+        return cls._weight_table
+
+    @classmethod
+    def weight_factor(cls, weight):
+        """
+        Returns the weight factor of fitness, exact or from the interpolated table
+        depending on **weight_table_step**.
+
+        .. seealso::
+            - Animals.set_weight_table()
+
+        |
+
+        """
+        if cls.weight_table_step is None:
+            return 1 / (1 + math.exp(-cls.params.phi_weight * (weight - cls.params.w_half)))
+        w_min, step, values, _ = cls._weight_table or cls._build_weight_table()
+        position = (weight - w_min) / step
+        if position <= 0:
+            return values[0]
+        if position >= len(values) - 1:
+            return values[-1]
+        index = int(position)
+        return values[index] + (position - index) * (values[index + 1] - values[index])
 
     def calculate_fitness(self):
         """
@@ -111,6 +423,13 @@ class Animals:
             .. math::
                 q^{\\pm}(a,a_{\\frac{1}{2}},\\phi) =  \\frac{1}{1 + e^{\\pm\\phi(x-x_\\frac{1}{2})}}
 
+        The age factor comes from the species' age table and the weight factor is
+        interpolated if a weight table is enabled.
+
+            .. seealso::
+                - Animals.age_factor()
+                - Animals.weight_factor()
+
 
         .. code-block:: python
 
@@ -126,14 +445,83 @@ class Animals:
             if self.weight <= 0:
                 self.fitness = 0
             else:
-                q_age = 1 / (1 + math.exp(self.guideline_params["phi_age"] *
-                                          (self.age - self.guideline_params["a_half"])))
-                q_weight = 1 / (1 + math.exp(-self.guideline_params["phi_weight"] *
-                                             (self.weight - self.guideline_params["w_half"])))
-                self.fitness = q_age * q_weight
+                self.fitness = self.age_factor(self.age) * self.weight_factor(self.weight)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing calculate_fitness(): {}'.format(err))
 
+    @classmethod
+    def calculate_fitness_batch(cls, age, weight):
+        """
+        Vectorized version of **calculate_fitness()** for many animals of one species.
+
+        Returns an array with the fitness of each (age, weight) pair. Animals with
+        ``weight <= 0`` get fitness 0. Exponents that overflow give the limiting value of
+        the sigmoid instead of an error. Integer ages, also when given as floats, are
+        looked up in the age table.
+
+        Parameters
+        ----------
+        age : array_like
+            Ages of the animals.
+        weight : array_like
+            Weights of the animals.
+
+
+        .. code-block:: python
+
+            fitness = Herbivore.calculate_fitness_batch([1, 10, 50], [5., 20., 0.])
+
+
+        |
+
+        """
+        age = np.asarray(age)
+        weight = np.asarray(weight, dtype=float)
+        if np.issubdtype(age.dtype, np.floating) and np.all(age == np.floor(age)):
+            age = age.astype(np.int64)
+        with np.errstate(over='ignore'):
+            if np.issubdtype(age.dtype, np.integer) and (age.size == 0 or age.min() >= 0):
+                max_age = age.max() if age.size > 0 else 0
+                if cls._age_array is None or (max_age >= len(cls._age_array) and
+                                              len(cls._age_array) < cls.age_table_limit()):
+                    cls.build_age_table(max_age)
+                table = cls._age_array
+                q_age = table[np.minimum(age, len(table) - 1)]
+            else:
+                q_age = 1 / (1 + np.exp(cls.params.phi_age * (age - cls.params.a_half)))
+            if cls.weight_table_step is None:
+                q_weight = 1 / (1 + np.exp(-cls.params.phi_weight *
+                                           (weight - cls.params.w_half)))
+            else:
+                w_min, step, _, values = cls._weight_table or cls._build_weight_table()
+                grid = w_min + step * np.arange(len(values))
+                q_weight = np.interp(weight, grid, values)
+        return np.where(weight <= 0, 0., q_age * q_weight)
+
+    @classmethod
+    def update_fitness_batch(cls, animals):
+        """
+        Recompute the stale fitness of a list of animals of this species with a single
+        call to **calculate_fitness_batch()**. Animals whose fitness is up to date are
+        left untouched.
+
+        Parameters
+        ----------
+        animals : list
+            Animals whose fitness is recomputed.
+
+
+        |
+
+        """
+        stale = [animal for animal in animals if animal._fitness is None]
+        if len(stale) == 0:
+            return
+        fitness = cls.calculate_fitness_batch([animal.age for animal in stale],
+                                              [animal.weight for animal in stale])
+        for animal, value in zip(stale, fitness.tolist()):
+            animal._fitness = value
+
     def procreation(self, cell_animal_count):
         """
         Compute the probability for an animal giving birth:
@@ -162,20 +550,18 @@ class Animals:
 
         """
         try:
+            p = self.params
             birth_prob = 0
-            if cell_animal_count > 1 and self.weight >= self.guideline_params["zeta"] * \
-                    (self.guideline_params["w_birth"] + self.guideline_params["sigma_birth"]):
-                birth_prob = min(1, self.guideline_params["gamma"] *
-                                 self.fitness * (cell_animal_count - 1))
-            if birth_prob > random.random():
+            if cell_animal_count > 1 and self.weight >= p.birth_weight_threshold:
+                birth_prob = min(1, p.gamma * self.fitness * (cell_animal_count - 1))
+            if birth_prob > self.random.random():
                 baby_age = 0
-                baby_weight = random.gauss(self.guideline_params["w_birth"],
-                                           self.guideline_params["sigma_birth"])
-                mother_weight_loss = self.guideline_params["xi"] * baby_weight
+                baby_weight = self.random.gauss(p.w_birth, p.sigma_birth)
+                mother_weight_loss = p.xi * baby_weight
                 if self.weight >= mother_weight_loss:
-                    baby = self.__class__(baby_age, baby_weight)
+                    baby = self.create(baby_age, baby_weight)
                     self.weight -= mother_weight_loss
-                    self.calculate_fitness()
+                    self._fitness = None
                     return baby
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing procreation(): {}'.format(err))
@@ -204,17 +590,17 @@ class Animals:
 
         """
         try:
-            migration_prob = self.guideline_params["mu"] * self.fitness
-            if migration_prob > random.random():
-                self.can_migrate = True
+            migration_prob = self.params.mu * self.fitness
+            if migration_prob > self.random.random():
+                self.flags |= CAN_MIGRATE
             else:
-                self.can_migrate = False
+                self.flags &= ~CAN_MIGRATE
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing migration(): {}'.format(err))
 
     def commence_aging(self):
         """
-        Increase animal age by 1 year and recompute animal weight and fitness.
+        Increase animal age by 1 year, recompute animal weight and mark fitness as stale.
 
         .. code-block:: python
 
@@ -229,9 +615,8 @@ class Animals:
         """
         try:
             self.age += 1
-            self.weight -= self.weight * self.guideline_params["eta"]
-            self.has_migrated = False
-            self.calculate_fitness()
+            self.weight -= self.weight * self.params.eta
+            self._fitness = None
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing commence_aging(): {}'.format(err))
 
@@ -264,15 +649,106 @@ class Animals:
         """
         try:
             if self.weight <= 0:
-                self.dead = True
+                self.flags |= DEAD
             else:
-                death_prob = self.guideline_params["omega"] * (1 - self.fitness)
-                if death_prob > random.random():
-                    self.dead = True
+                death_prob = self.params.omega * (1 - self.fitness)
+                if death_prob > self.random.random():
+                    self.flags |= DEAD
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing death(): {}'.format(err))
 
 
+class AnimalPool:
+    """
+    Free list of dead animals of one species that are recycled as newborns.
+
+    Dead animals handed to **release()** are kept and reinitialized by **acquire()**
+    instead of allocating a new object. A recycled animal is indistinguishable from a new
+    one, so simulation results do not depend on whether a pool is used.
+
+    Parameters
+    ----------
+    species : type
+        Animal class whose objects are pooled.
+    max_size : int
+        Maximum number of free animals kept, or *None* for no limit.
+
+    Attributes
+    ----------
+    hits
+        *int*: Number of animals recycled from the pool.
+
+        |
+
+    misses
+        *int*: Number of animals created because the pool was empty.
+
+        |
+
+
+    .. code-block:: python
+
+        Herbivore.pool = AnimalPool(Herbivore)
+        baby = Herbivore.create(0, 8.)
+
+
+    |
+
+    """
+
+    def __init__(self, species, max_size=None):
+        if max_size is not None and (type(max_size) is not int or max_size < 0):
+            raise ValueError('max_size must be a non-negative integer or None')
+        self.species = species
+        self.max_size = max_size
+        self.free = []
+        self.hits = 0
+        self.misses = 0
+
+    def acquire(self, age, weight):
+        """
+        Returns an animal with the given age and weight, reusing a free animal if
+        available.
+
+        |
+
+        """
+        if len(self.free) == 0:
+            self.misses += 1
+            return self.species(age, weight)
+        self.hits += 1
+        animal = self.free.pop()
+        animal.__init__(age, weight)
+        return animal
+
+    def release(self, animals):
+        """
+        Return dead animals to the pool. The animals must not be referenced elsewhere.
+
+        Parameters
+        ----------
+        animals : list
+            Dead animals of the pooled species.
+
+        |
+
+        """
+        if self.max_size is None:
+            self.free.extend(animals)
+        else:
+            self.free.extend(animals[:max(0, self.max_size - len(self.free))])
+
+    def stats(self):
+        """
+        Returns a dictionary with the counters *hits* and *misses* and the number of
+        free animals *size*.
+
+        |
+
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.free)}
+
+
 class Herbivore(Animals):
     """
     The 'Herbivore' animal type, subclass of *Animals* class: feeds on fodder in
@@ -325,6 +801,8 @@ class Herbivore(Animals):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, age, weight):
         super().__init__(age, weight)
 
@@ -368,11 +846,11 @@ class Herbivore(Animals):
 
         """
         try:
-            f = self.guideline_params["F"]
+            f = self.params.F
             if f > cell_food_amount:
                 f = cell_food_amount
-            self.weight += f * self.guideline_params["beta"]
-            self.calculate_fitness()
+            self.weight += f * self.params.beta
+            self._fitness = None
             feed_left = cell_food_amount - f
             return feed_left
         except RuntimeError as err:
@@ -441,6 +919,8 @@ class Carnivore(Animals):
 
     """
 
+    __slots__ = ()
+
     def __init__(self, age, weight):
         super().__init__(age, weight)
 
@@ -461,15 +941,23 @@ class Carnivore(Animals):
                         'DeltaPhiMax': 10.0
                         }
 
-    def feeds(self, herbivores):
+    def feeds(self, herbivores, fitness=None):
         """
         Function for carnivores preying on herbivores.
 
+        Herbivores at least as fit as the carnivore cannot be killed and are skipped
+        without a draw, as are herbivores already flagged **dead**, so a list can be
+        shared by several carnivores without removing the kills in between.
+
         Parameters
         ----------
         herbivores : list
             The list of herbivores present in the cell. The attribute **dead** is set *True*
             for each herbivores that is killed by the carnivore.
+        fitness : list
+            Fitness of **herbivores**, if they are sorted by increasing fitness. The
+            carnivore then only tries the herbivores less fit than itself, found by
+            binary search, and the search is repeated after each kill.
 
 
         .. code-block:: python
@@ -484,30 +972,39 @@ class Carnivore(Animals):
 
         """
         try:
+            p = self.params
             amount_eaten = 0
-            for herbivore in herbivores:
+            index = 0
+            stop = len(herbivores) if fitness is None else bisect_left(fitness, self.fitness)
+            while index < stop:
+                herbivore = herbivores[index]
+                index += 1
+                if herbivore.flags & DEAD:
+                    continue
                 fitness_difference = self.fitness - herbivore.fitness
-                if self.fitness <= herbivore.fitness:
-                    eating_probability = 0
-                elif 0 < fitness_difference < self.guideline_params["DeltaPhiMax"]:
-                    eating_probability = fitness_difference / self.guideline_params["DeltaPhiMax"]
+                if fitness_difference <= 0:
+                    continue
+                elif fitness_difference < p.DeltaPhiMax:
+                    eating_probability = fitness_difference * p.inv_delta_phi_max
                 else:
                     eating_probability = 1
 
-                if eating_probability > random.random():
-                    herbivore.dead = True
-                    self.weight += self.guideline_params["beta"] * herbivore.weight
+                if eating_probability > self.random.random():
+                    herbivore.flags |= DEAD
+                    self.weight += p.beta * herbivore.weight
                     amount_eaten += herbivore.weight
-                    self.calculate_fitness()
-                    if amount_eaten >= self.guideline_params["F"]:
+                    self._fitness = None
+                    if amount_eaten >= p.F:
                         break
+                    if fitness is not None:
+                        stop = bisect_left(fitness, self.fitness)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while executing Carnivore.feeds(): {}'.format(err))
 
         return None
 
 
-def set_animal_params(species, params):
+def set_animal_params(species, params, species_classes=None):
     """
 
     Parameters
@@ -521,6 +1018,11 @@ def set_animal_params(species, params):
         .. seealso::
             - Animals.update_defaults()
 
+    species_classes : dict
+        Mapping from species name to the classes to update, e.g. the species of one
+        *Island*. If *None*, the module-level *Herbivore* and *Carnivore* are updated,
+        which changes the defaults of all simulations created afterwards.
+
 
     .. code-block:: python
 
@@ -530,9 +1032,8 @@ def set_animal_params(species, params):
     |
 
     """
-    if species == 'Herbivore':
-        Herbivore.update_defaults(params)
-    elif species == 'Carnivore':
-        Carnivore.update_defaults(params)
-    else:
+    if species_classes is None:
+        species_classes = {'Herbivore': Herbivore, 'Carnivore': Carnivore}
+    if species not in species_classes:
         raise ValueError('Cannot identify species')
+    species_classes[species].update_defaults(params)
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements a replicate-batched simulation engine for Rossumøya island. It runs
+R independent replicates of the same island in one columnar state: replicate *r* owns the
+habitable cells ``r * n_cells`` to ``(r + 1) * n_cells - 1`` of the stores, and since
+animals only interact within a cell, one vectorized annual cycle advances all replicates
+together.
+
+Each replicate draws its random numbers from its own generator, seeded with ``seed + r``,
+in the same order as *ColumnarIsland*. Replicate *r* therefore reproduces
+``BioSim(..., seed=seed + r, engine='columnar')`` exactly.
+
+The engine is selected with ``BioSim(..., engine='batch', replicates=R)``.
+"""
+
+import numpy as np
+
+from .columnar import ColumnarIsland
+
+
+class BatchIsland(ColumnarIsland):
+    """
+    Island model running **replicates** independent copies of the island at once.
+
+    Counts returned by **get_total_species_count()** and **get_total_animal_count()**
+    are arrays with one entry per replicate. Visualization is not supported.
+
+    Parameters
+    ----------
+    replicates : int
+        Number of replicates.
+
+        |
+
+    Attributes
+    ----------
+    rngs
+        *list*: Random generator of each replicate.
+
+        |
+
+    .. seealso::
+        - biosim.columnar.ColumnarIsland
+
+    |
+
+    """
+
+    def __init__(self, geo, img_dir=None, img_name=None, img_fmt=None, seed=None,
+                 replicates=1):
+        if type(replicates) is not int or replicates < 1:
+            raise ValueError('replicates must be a positive integer')
+        self.replicates = replicates
+        super().__init__(geo, img_dir=img_dir, img_name=img_name, img_fmt=img_fmt, seed=seed)
+        self.rngs = [np.random.default_rng(None if seed is None else seed + r)
+                     for r in range(replicates)]
+        n_cells = len(self.habitable)
+        offset = n_cells * np.arange(replicates)[:, None, None]
+        self.neighbours = np.where(self.neighbours >= 0, self.neighbours + offset,
+                                   -1).reshape(-1, 4)
+        self.neighbour_mask = self.neighbours >= 0
+        self.populations = {name: self.store_class(cls, n_cells * replicates)
+                            for name, cls in self.species.items()}
+        self.reset_fodder()
+
+    @property
+    def n_cells(self):
+        """
+        Number of habitable cells of one replicate.
+
+        |
+
+        """
+        return len(self.habitable)
+
+    def reset_fodder(self):
+        """
+        Reset the fodder of every habitable cell of every replicate to its *f_max*.
+
+        |
+
+        """
+        self.fodder = np.tile(self.fodder_max, self.replicates)
+
+    def draw(self, cell, method, *args):
+        """
+        Returns one random number for every entry of **cell**, drawn with the generator
+        method **method** (e.g. ``'random'``) of the entry's replicate. Each replicate gets
+        its numbers in the order its entries appear in **cell**.
+
+        |
+
+        """
+        replicate = np.asarray(cell) // self.n_cells
+        order = np.argsort(replicate, kind='stable')
+        sizes = np.bincount(replicate, minlength=self.replicates)
+        values = np.concatenate([getattr(rng, method)(*args, size=size)
+                                 for rng, size in zip(self.rngs, sizes)])
+        result = np.empty(len(values), dtype=values.dtype)
+        result[order] = values
+        return result
+
+    def cell_rng(self, cell):
+        """
+        Returns the random generator of the replicate **cell** belongs to.
+
+        |
+
+        """
+        return self.rngs[cell // self.n_cells]
+
+    def uniform(self, cell):
+        """
+        Returns one uniform random number for every entry of **cell**, drawn from the
+        generator of its replicate.
+
+        |
+
+        """
+        return self.draw(cell, 'random')
+
+    def integers(self, cell, high):
+        """
+        Returns one random integer in [0, **high**) for every entry of **cell**, drawn
+        from the generator of its replicate.
+
+        |
+
+        """
+        return self.draw(cell, 'integers', 0, high)
+
+    def normal(self, cell, loc, scale):
+        """
+        Returns one normally distributed random number for every entry of **cell**,
+        drawn from the generator of its replicate.
+
+        |
+
+        """
+        return self.draw(cell, 'normal', loc, scale)
+
+    def add_population(self, population):
+        """
+        Add population (herbivores and/or carnivores) to the cells of every replicate.
+
+        .. seealso::
+                - Island.add_population(population)
+
+        |
+
+        """
+        try:
+            for record in population:
+                loc = tuple(record['loc'])
+                if loc not in self.cell_index:
+                    raise ValueError('Cannot place animals at {}'.format(loc))
+                if any(x['species'] not in self.populations for x in record['pop']):
+                    raise KeyError('Invalid species. Valid keys are: Herbivore and Carnivore')
+                cells = self.cell_index[loc] + self.n_cells * np.arange(self.replicates)
+                for name, store in self.populations.items():
+                    animals = [x for x in record['pop'] if x['species'] == name]
+                    store.append(np.repeat(cells, len(animals)),
+                                 np.tile([x['age'] for x in animals], self.replicates),
+                                 np.tile([x['weight'] for x in animals], self.replicates))
+            for store in self.populations.values():
+                store.sort_by_cell()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed to add population in island: {}'.format(err))
+
+    def get_total_species_count(self):
+        """
+        Returns a dictionary with arrays of the counts of herbivores and carnivores in
+        each replicate.
+
+        |
+
+        """
+        return {name: store.counts().reshape(self.replicates, -1).sum(axis=1)
+                for name, store in self.populations.items()}
+
+    def get_total_animal_count(self):
+        """
+        Returns an array with the total number of animals in each replicate.
+
+        |
+
+        """
+        return sum(self.get_total_species_count().values())
+
+    def setup_visualization(self, total_years, cmax, hist_specs, y_max, img_years):
+        """
+        Replicates cannot be visualized; raises *ValueError*.
+
+        |
+
+        """
+        raise ValueError('The batch engine does not support visualization, use vis_years=0')
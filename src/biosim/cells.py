@@ -7,7 +7,9 @@ Water, Desert, Highland, and Lowland.
 
 """
 
-from .animals import Herbivore, Carnivore, set_animal_params
+import numpy as np
+
+from .animals import Herbivore, Carnivore, set_animal_params, DEAD
 
 
 class Cell:
@@ -23,17 +25,96 @@ class Cell:
     carnivores
         List of carnivores present in the cell.
     food_status
-        Amount of food available in the cell.
+        Amount of food available in the cell. It is kept in an array shared with the other
+        cells of the island, see **bind_fodder()**.
+    species
+        Mapping from species name to the animal class used for animals added to the
+        cell. Cells derived for a simulation with **derive()** use that simulation's species.
+    strategy
+        How the island processes the cell this year: *'object'* (default) calls the
+        methods of each animal, *'vector'* uses the ``*_vector`` methods, which work on
+        NumPy arrays of the animals' state and draw from a NumPy generator.
 
         |
 
     """
 
+    species = {'Herbivore': Herbivore, 'Carnivore': Carnivore}
+    strategy = 'object'
+
     def __init__(self, loc):
         self.loc = loc
         self.herbivores = []
         self.carnivores = []
-        self.food_status = self.f_max
+        self.bind_fodder(np.array([self.f_max], dtype=float), 0)
+        self._active = None
+
+    @property
+    def food_status(self):
+        return float(self._fodder[self._index])
+
+    @food_status.setter
+    def food_status(self, value):
+        self._fodder[self._index] = value
+
+    def bind_fodder(self, fodder, index):
+        """
+        Keep the fodder of the cell in entry **index** of the array **fodder**, e.g. the
+        fodder array of the island, so that all cells can be grazed and reset at once.
+        A new cell keeps its fodder in an array of its own.
+
+        .. code-block:: python
+
+            fodder = np.zeros(2)
+            lowland = Lowland((10, 10))
+            lowland.bind_fodder(fodder, 1)
+            lowland.reset_cell()
+            print(fodder)
+
+
+        |
+
+        """
+        self._fodder = fodder
+        self._index = index
+
+    def bind_active(self, active):
+        """
+        Add the cell to the set **active**, e.g. the active cells of the island, whenever
+        animals are added to it with **add_animal()**.
+
+        |
+
+        """
+        self._active = active
+
+    @classmethod
+    def derive(cls, species=None):
+        """
+        Returns a subclass of the cell type with its own copy of *f_max*, so that a
+        simulation can change its fodder without affecting other simulations or the
+        module-level defaults.
+
+        Parameters
+        ----------
+        species : dict
+            Mapping from species name to animal class used by cells of the derived type.
+            If *None*, the parent's species are used.
+
+
+        .. code-block:: python
+
+            MyLowland = Lowland.derive()
+            MyLowland.update_defaults({'f_max': 500})
+
+
+        |
+
+        """
+        attributes = {'__module__': cls.__module__, 'f_max': cls.f_max}
+        if species is not None:
+            attributes['species'] = species
+        return type(cls.__name__, (cls,), attributes)
 
     @classmethod
     def update_defaults(cls, params):
@@ -95,21 +176,23 @@ class Cell:
                 if x['species'] not in ['Herbivore', 'Carnivore']:
                     raise KeyError('Invalid species. Valid keys are: Herbivore and Carnivore')
                 elif x['species'] == 'Herbivore':
-                    obj = Herbivore(x['age'], x['weight'])
+                    obj = self.species['Herbivore'](x['age'], x['weight'])
                     self.herbivores.append(obj)
                 elif x['species'] == 'Carnivore':
-                    obj = Carnivore(x['age'], x['weight'])
+                    obj = self.species['Carnivore'](x['age'], x['weight'])
                     self.carnivores.append(obj)
+            if self._active is not None and (self.herbivores or self.carnivores):
+                self._active.add(self)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while adding animal to cell: {}'.format(err))
 
     def animals_feed(self):
         """
-        Animals feeding in a cell.
+        Animals feeding in a cell. Herbivores eat in list order, then carnivores hunt.
 
             .. seealso::
                 - biosim.animals.Herbivore.feeds()
-                - biosim.animals.Carnivore.feeds()
+                - Cell.carnivores_feed()
 
 
         .. code-block:: python
@@ -127,12 +210,34 @@ class Cell:
         try:
             for animal in self.herbivores:
                 self.food_status = animal.feeds(self.food_status)
+            self.species['Herbivore'].update_fitness_batch(self.herbivores)
+            self.carnivores_feed()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal feeding cycle: {}'.format(err))
+
+    def carnivores_feed(self):
+        """
+        Carnivores hunting in a cell, in order of decreasing fitness. Each carnivore tries
+        the herbivores in order of increasing fitness, and killed herbivores are removed
+        once every carnivore has hunted.
+
+            .. seealso::
+                - biosim.animals.Carnivore.feeds()
+
+        |
+
+        """
+        try:
+            if len(self.carnivores) == 0:
+                return
             # Sort animals in cell by fitness
             self.carnivores.sort(key=lambda x: x.fitness, reverse=True)
+            # Herbivore fitness does not change while carnivores hunt, so one sort will do
+            self.herbivores.sort(key=lambda x: x.fitness, reverse=False)
+            fitness = [animal.fitness for animal in self.herbivores]
             for animal in self.carnivores:
-                self.herbivores.sort(key=lambda x: x.fitness, reverse=False)
-                animal.feeds(self.herbivores)
-                self.herbivores = [_herb for _herb in self.herbivores if not _herb.dead]
+                animal.feeds(self.herbivores, fitness)
+            self.herbivores = self.remove_dead(self.herbivores, 'Herbivore')
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while animal feeding cycle: {}'.format(err))
 
@@ -140,6 +245,11 @@ class Cell:
         """
         Animals procreating in a cell.
 
+        Each species is handled in one batch: the birth probabilities of all animals are
+        computed at once, and the birth draws and newborn weights come from the species'
+        generator in the same order as if every animal called **procreation()**. The
+        weight loss of the mothers and their fitness are then updated in one batch.
+
             .. seealso::
                 - biosim.animals.Animals.procreation()
 
@@ -157,26 +267,37 @@ class Cell:
 
         """
         try:
-            index = 0
-            newborn_herbivores = []
-            newborn_carnivores = []
-            while index < len(self.herbivores):
-                animal = self.herbivores[index]
-                baby = animal.procreation(number_of_herbivores)
-                if baby is not None:
-                    newborn_herbivores.append(baby)
-                index += 1
-            index = 0
-            while index < len(self.carnivores):
-                animal = self.carnivores[index]
-                baby = animal.procreation(number_of_carnivores)
-                if baby is not None:
-                    newborn_carnivores.append(baby)
-                index += 1
-            return newborn_herbivores, newborn_carnivores
+            return (self._procreate_batch('Herbivore', self.herbivores, number_of_herbivores),
+                    self._procreate_batch('Carnivore', self.carnivores, number_of_carnivores))
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while animal procreation cycle: {}'.format(err))
 
+    def _procreate_batch(self, name, animals, n):
+        if len(animals) == 0:
+            return []
+        cls = self.species[name]
+        p = cls.params
+        weight = self.state(animals, 'weight')
+        prob = np.zeros(len(animals))
+        if n > 1:
+            fertile = weight >= p.birth_weight_threshold
+            fitness = self.state([animals[i] for i in np.flatnonzero(fertile)], 'fitness')
+            prob[fertile] = np.minimum(1, p.gamma * fitness * (n - 1))
+        draw, gauss = cls.random.random, cls.random.gauss
+        births = [(index, gauss(p.w_birth, p.sigma_birth))
+                  for index, birth_prob in enumerate(prob.tolist()) if birth_prob > draw()]
+        if len(births) == 0:
+            return []
+        index, baby_weight = (np.array(values) for values in zip(*births))
+        return self._deliver(cls, animals, weight, index, baby_weight)
+
+    def _deliver(self, cls, animals, weight, births, baby_weight):
+        weight_loss = cls.params.xi * baby_weight
+        delivered = weight[births] >= weight_loss
+        mothers = [animals[index] for index in births[delivered].tolist()]
+        self.set_state(cls, mothers, weight=weight[births[delivered]] - weight_loss[delivered])
+        return [cls.create(0, w) for w in baby_weight[delivered].tolist()]
+
     def animals_migrate(self):
         """
         Animals migrating from one cell to another.
@@ -228,6 +349,8 @@ class Cell:
         try:
             for animal in self.herbivores + self.carnivores:
                 animal.commence_aging()
+            self.species['Herbivore'].update_fitness_batch(self.herbivores)
+            self.species['Carnivore'].update_fitness_batch(self.carnivores)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while animal aging cycle: {}'.format(err))
 
@@ -256,11 +379,316 @@ class Cell:
             for animal in self.herbivores + self.carnivores:
                 animal.death()
 
-            self.herbivores = [herbivore for herbivore in self.herbivores if not herbivore.dead]
-            self.carnivores = [carnivore for carnivore in self.carnivores if not carnivore.dead]
+            self.herbivores = self.remove_dead(self.herbivores, 'Herbivore')
+            self.carnivores = self.remove_dead(self.carnivores, 'Carnivore')
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while animal death cycle: {}'.format(err))
 
+    def animals_feed_vector(self, rng):
+        """
+        Vectorized version of **animals_feed()** for cells with many animals.
+
+        Herbivores eat in list order as in **animals_feed()**, with the intake of all of
+        them computed at once and their fitness recomputed in one batch. Carnivores then
+        hunt with **carnivores_feed_vector()**.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Generator for the carnivores' draws.
+
+        |
+
+        """
+        try:
+            if len(self.herbivores) > 0:
+                herbivore = self.species['Herbivore']
+                eaten, left = self.graze([self.food_status], [len(self.herbivores)],
+                                         herbivore.params.F)
+                self.food_status = left[0]
+                self.set_state(herbivore, self.herbivores,
+                               weight=self.state(self.herbivores, 'weight') +
+                               herbivore.params.beta * eaten)
+            self.carnivores_feed_vector(rng)
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal feeding cycle: {}'.format(err))
+
+    def carnivores_feed_vector(self, rng):
+        """
+        Vectorized version of **carnivores_feed()**.
+
+        Herbivores are sorted by fitness once, and each carnivore finds the living
+        herbivores less fit than itself by binary search. It draws one uniform number for
+        each of them up front and kills the first herbivore whose kill probability exceeds
+        its draw; after a kill the search continues with the carnivore's new fitness,
+        extended to herbivores that have come within reach. Kills are masked out and
+        removed at the end.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Generator for the carnivores' draws.
+
+            .. seealso::
+                - biosim.columnar.ColumnarIsland.carnivores_feed()
+
+        |
+
+        """
+        try:
+            if len(self.carnivores) == 0:
+                return
+            self.carnivores.sort(key=lambda x: x.fitness, reverse=True)
+            if len(self.herbivores) == 0:
+                return
+            self.herbivores.sort(key=lambda x: x.fitness)
+            p = self.species['Carnivore'].params
+            fitness = self.state(self.herbivores, 'fitness')
+            weight = self.state(self.herbivores, 'weight')
+            alive = np.ones(len(self.herbivores), dtype=bool)
+            for carnivore in self.carnivores:
+                stop = fitness.searchsorted(carnivore.fitness)
+                prey = np.flatnonzero(alive[:stop])
+                draws = rng.random(len(prey))
+                amount_eaten = 0.
+                start = 0
+                while start < len(prey):
+                    diff = carnivore.fitness - fitness[prey[start:]]
+                    prob = np.where(diff < p.DeltaPhiMax, diff * p.inv_delta_phi_max, 1.)
+                    hits = np.flatnonzero(prob > draws[start:])
+                    if len(hits) == 0:
+                        break
+                    victim = prey[start + hits[0]]
+                    alive[victim] = False
+                    self.herbivores[victim].flags |= DEAD
+                    carnivore.weight += p.beta * weight[victim]
+                    carnivore._fitness = None
+                    amount_eaten += weight[victim]
+                    if amount_eaten >= p.F:
+                        break
+                    start += hits[0] + 1
+                    reach = fitness.searchsorted(carnivore.fitness)
+                    if reach > stop:
+                        more = stop + np.flatnonzero(alive[stop:reach])
+                        prey = np.concatenate((prey, more))
+                        draws = np.concatenate((draws, rng.random(len(more))))
+                        stop = reach
+            self.herbivores = self.remove_dead(self.herbivores, 'Herbivore')
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal feeding cycle: {}'.format(err))
+
+    def animals_procreate_vector(self, rng):
+        """
+        Vectorized version of **animals_procreate()**, returning the newborn herbivores
+        and carnivores.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Generator for the birth draws and the weights of the newborns.
+
+        |
+
+        """
+        try:
+            return tuple(self._procreate_vector(name, animals, rng) for name, animals in
+                         (('Herbivore', self.herbivores), ('Carnivore', self.carnivores)))
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal procreation cycle: {}'.format(err))
+
+    def _procreate_vector(self, name, animals, rng):
+        n = len(animals)
+        if n < 2:
+            return []
+        cls = self.species[name]
+        p = cls.params
+        weight = self.state(animals, 'weight')
+        prob = np.minimum(1, p.gamma * self.state(animals, 'fitness') * (n - 1))
+        births = np.flatnonzero((weight >= p.birth_weight_threshold) & (prob > rng.random(n)))
+        baby_weight = rng.normal(p.w_birth, p.sigma_birth, size=len(births))
+        return self._deliver(cls, animals, weight, births, baby_weight)
+
+    def animals_age_and_die(self):
+        """
+        Aging and death of the animals of the cell in one sweep per species.
+
+        Each species takes one pass over its animals to age them and read their state,
+        and one to store the new weight and fitness, make the death draws and compact
+        the survivors in place; fitness and death probabilities are computed in between
+        with array operations. The draws come from the species' generator in the same
+        order as **animals_age()** followed by **animals_death()**. The fitness, weight
+        and age of the survivors are returned for the annual statistics.
+
+            .. seealso::
+                - biosim.animals.Animals.commence_aging()
+                - biosim.animals.Animals.death()
+
+
+        .. code-block:: python
+
+            lowland = Lowland(10,10)
+            herb = [{'species': 'Herbivore', 'age': 1, 'weight': 10} for _ in range(5)]
+            lowland.add_animal(herb)
+            stats = lowland.animals_age_and_die()
+            fitness, weight, age = stats['Herbivore']
+
+
+        |
+
+        """
+        try:
+            return {'Herbivore': self._age_and_die('Herbivore', self.herbivores),
+                    'Carnivore': self._age_and_die('Carnivore', self.carnivores)}
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal aging and death cycle: {}'.format(err))
+
+    def animals_age_and_die_vector(self, rng):
+        """
+        Vectorized version of **animals_age_and_die()**. The death draws of each species
+        are made at once from **rng**, one for every animal.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator
+            Generator for the death draws.
+
+        |
+
+        """
+        try:
+            return {'Herbivore': self._age_and_die('Herbivore', self.herbivores, rng),
+                    'Carnivore': self._age_and_die('Carnivore', self.carnivores, rng)}
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while animal aging and death cycle: {}'.format(err))
+
+    def _age_and_die(self, name, animals, rng=None):
+        if len(animals) == 0:
+            return np.empty(0), np.empty(0), np.empty(0, dtype=np.int64)
+        cls = self.species[name]
+        ages, weights = [], []
+        for animal in animals:
+            animal.age += 1
+            ages.append(animal.age)
+            weights.append(animal.weight)
+        # Ages keep their own type, so non-integer ages are not truncated
+        age = np.array(ages)
+        weight = np.array(weights, dtype=float)
+        weight -= weight * cls.params.eta
+        fitness = cls.calculate_fitness_batch(age, weight)
+        prob = cls.params.omega * (1 - fitness)
+        weights, fitnesses = weight.tolist(), fitness.tolist()
+        if rng is None:
+            random = cls.random.random
+            dies = (w <= 0 or death_prob > random()
+                    for w, death_prob in zip(weights, prob.tolist()))
+        else:
+            dies = ((weight <= 0) | (prob > rng.random(len(animals)))).tolist()
+        alive, dead, survived = [], [], []
+        for animal, w, phi, died in zip(animals, weights, fitnesses, dies):
+            animal.weight = w
+            animal._fitness = phi
+            if died:
+                animal.flags |= DEAD
+                dead.append(animal)
+            else:
+                alive.append(animal)
+            survived.append(not died)
+        if len(dead) == 0:
+            return fitness, weight, age
+        animals[:] = alive
+        if cls.pool is not None:
+            cls.pool.release(dead)
+        survived = np.array(survived)
+        return fitness[survived], weight[survived], age[survived]
+
+    @staticmethod
+    def graze(fodder, sizes, f):
+        """
+        Returns the amount eaten by each herbivore and the fodder left in each cell when
+        **sizes** herbivores eat in turn from cells with **fodder**, each taking **f** or
+        what is left when less than **f** remains. Herbivores are ordered by cell.
+
+        The fodder of a cell is reduced by one subtraction of **f** per herbivore, as in
+        *Herbivore.feeds()*, so the results equal those of herbivores eating one by one
+        also when **f** is not exactly representable in floating point. Only the first
+        ``fodder // f + 2`` turns of a cell are computed, later herbivores find nothing.
+
+        .. code-block:: python
+
+            eaten, left = Cell.graze([25., 800.], [3, 2], 10.)
+            print(eaten, left)
+
+
+        |
+
+        """
+        fodder = np.asarray(fodder, dtype=float)
+        sizes = np.asarray(sizes, dtype=np.int64)
+        turns = int(sizes.max()) if len(sizes) > 0 else 0
+        if f > 0 and len(fodder) > 0:
+            turns = min(turns, int(fodder.max() // f) + 2)
+        steps = np.full((len(fodder), turns + 1), float(f))
+        steps[:, 0] = fodder
+        left = np.subtract.accumulate(steps, axis=1)
+        rank = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        row = np.repeat(np.arange(len(fodder)), sizes)
+        eaten = np.zeros(len(rank))
+        within = rank <= turns
+        eaten[within] = np.clip(left[row[within], rank[within]], 0, f)
+        return eaten, np.maximum(left[np.arange(len(fodder)), np.minimum(sizes, turns)], 0.)
+
+    @staticmethod
+    def state(animals, attribute):
+        """
+        Returns an array with the value of **attribute** (e.g. *'weight'*) of each animal.
+
+        |
+
+        """
+        return np.array([getattr(animal, attribute) for animal in animals], dtype=float)
+
+    @staticmethod
+    def set_state(animal_class, animals, weight):
+        """
+        Store new weights of **animals** of species **animal_class** and recompute their fitness
+        with one call to **calculate_fitness_batch()**.
+
+        |
+
+        """
+        if len(animals) == 0:
+            return
+        fitness = animal_class.calculate_fitness_batch([animal.age for animal in animals],
+                                                       weight)
+        for animal, w, phi in zip(animals, weight.tolist(), fitness.tolist()):
+            animal.weight = w
+            animal._fitness = phi
+
+    def remove_dead(self, animals, species):
+        """
+        Returns the living animals of a list, handing the dead ones to the pool of the
+        species if it has one.
+
+        Parameters
+        ----------
+        animals : list
+            Animals of one species in the cell.
+        species : str
+            Name of the species, *'Herbivore'* or *'Carnivore'*.
+
+            .. seealso::
+                - biosim.animals.AnimalPool
+
+
+        |
+
+        """
+        alive = [animal for animal in animals if not animal.flags & DEAD]
+        pool = self.species[species].pool
+        if pool is not None and len(alive) < len(animals):
+            pool.release([animal for animal in animals if animal.flags & DEAD])
+        return alive
+
     def reset_cell(self):
         """
 
@@ -378,7 +806,11 @@ class Desert(Cell):
     rgb = (1.0, 1.0, 0.5)
 
 
-def set_cell_params(land_type, params):
+#: Landscape classes by map code letter.
+LANDSCAPES = {'W': Water, 'L': Lowland, 'H': Highland, 'D': Desert}
+
+
+def set_cell_params(land_type, params, landscapes=None):
     """
 
     Set the maximum amount of fodder in cells.
@@ -395,6 +827,11 @@ def set_cell_params(land_type, params):
         .. seealso::
             - Cell.update_defaults()
 
+    landscapes : dict
+        Mapping from code letter to the cell classes to update, e.g. the landscapes of one
+        *Island*. If *None*, the module-level classes are updated, which changes the
+        defaults of all simulations created afterwards.
+
 
     .. code-block:: python
 
@@ -404,6 +841,8 @@ def set_cell_params(land_type, params):
     |
 
     """
+    if landscapes is None:
+        landscapes = LANDSCAPES
 
     if land_type not in ['H', 'L', 'D', 'W']:
         raise KeyError('Invalid keys for land_tpe.')
@@ -418,18 +857,18 @@ def set_cell_params(land_type, params):
         raise ValueError('f_max must be numeric and cannot be negative.')
 
     if land_type == 'H' and 'f_max' in params.keys():
-        Highland.update_defaults(params)
+        landscapes['H'].update_defaults(params)
     elif land_type == 'L' and 'f_max' in params.keys():
-        Lowland.update_defaults(params)
+        landscapes['L'].update_defaults(params)
     elif land_type == 'D':
-        Desert.update_defaults(params)
+        landscapes['D'].update_defaults(params)
     elif land_type == 'W':
         raise ValueError('Water cannot have food')
     else:
         raise ValueError('Cannot Identify Land Type')
 
 
-def update_animal_params(species, params):
+def update_animal_params(species, params, species_classes=None):
     """
     Update animal parameters.
 
@@ -439,4 +878,4 @@ def update_animal_params(species, params):
     |
 
     """
-    set_animal_params(species, params)
+    set_animal_params(species, params, species_classes)
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements a cohort-compressed simulation engine for Rossumøya island. Animals
+of one species that share cell, age and weight are stored as a single *cohort* with a
+multiplicity, and the phases of the annual cycle draw binomial and multinomial counts for
+whole cohorts. A cohort is only split when the states of its members diverge, e.g. when
+some of them find fodder and others do not, and identical cohorts are merged again at the
+end of each year. The cost of a year therefore grows with the number of distinct states
+rather than with the number of animals.
+
+Births and kills give every mother, newborn and successful hunter its own weight, so those
+animals form cohorts of one until their states meet again.
+
+The engine is selected with ``BioSim(..., engine='cohort')``.
+"""
+
+import numpy as np
+
+from .columnar import ColumnarIsland, PopulationStore
+
+
+class CohortStore(PopulationStore):
+    """
+    Columnar storage of the cohorts of one species on the island.
+
+    Every row of the store is a cohort of identical animals. Segment offsets index rows,
+    while **counts()** and **len()** count animals.
+
+    .. seealso::
+        - biosim.columnar.PopulationStore
+
+    Attributes
+    ----------
+    count
+        *ndarray*: Number of animals in each cohort.
+
+        |
+
+    """
+
+    columns = PopulationStore.columns + ('count',)
+
+    def __init__(self, species, n_cells):
+        super().__init__(species, n_cells)
+        self.count = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return int(self.count.sum())
+
+    @property
+    def n_cohorts(self):
+        """
+        Number of cohorts in the store.
+
+        |
+
+        """
+        return len(self.age)
+
+    def append(self, cell, age, weight, count=None):
+        """
+        Append cohorts to the store. Each cohort holds one animal unless **count** is
+        given.
+
+        .. seealso::
+            - PopulationStore.append()
+
+        |
+
+        """
+        super().append(cell, age, weight)
+        if count is None:
+            count = np.ones(len(np.atleast_1d(age)), dtype=np.int64)
+        self.count = np.concatenate((self.count, np.asarray(count, dtype=np.int64)))
+
+    def take(self, index):
+        """
+        Keep only the cohorts selected by **index**, in the order given by **index**.
+
+        .. seealso::
+            - PopulationStore.take()
+
+        |
+
+        """
+        super().take(index)
+        self.count = self.count[index]
+
+    def counts(self):
+        """
+        Returns the number of animals in each cell.
+
+        |
+
+        """
+        return np.bincount(self.cell, weights=self.count,
+                           minlength=self.n_cells).astype(np.int64)
+
+    def expand(self, values):
+        """
+        Returns **values**, one per cohort, repeated once for every animal of the cohort.
+
+        |
+
+        """
+        return np.repeat(values, self.count)
+
+    def merge(self):
+        """
+        Merge cohorts with the same cell, age and weight into one and drop empty cohorts.
+        Merged cohorts take the place of their first member, so the order of animals in
+        each cell is kept.
+
+        |
+
+        """
+        self.compact(self.count > 0)
+        if self.n_cohorts < 2:
+            return
+        keys = np.column_stack((self.cell, self.age, self.weight))
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        total = np.bincount(inverse.ravel(), weights=self.count).astype(np.int64)
+        order = np.argsort(first)
+        self.take(first[order])
+        self.count = total[order]
+        self.rebuild_offsets()
+
+
+class CohortIsland(ColumnarIsland):
+    """
+    Island model backed by one *CohortStore* per species.
+
+    It follows the same annual cycle as *Island*, with random numbers from the island's
+    NumPy generator, so results are statistically equivalent to the other engines.
+    The lists of annual fitness, age and weight values hold one entry per animal and are
+    only filled when the island is visualized or **collect_annual_stats()** is called.
+
+    .. seealso::
+        - biosim.island.Island
+        - biosim.columnar.ColumnarIsland
+
+    |
+
+    """
+
+    store_class = CohortStore
+    lazy_stats = True
+
+    def add_population(self, population):
+        """
+        Add population (herbivores and/or carnivores) to the cells on the island and
+        merge identical animals into cohorts.
+
+        .. seealso::
+                - Island.add_population(population)
+
+        |
+
+        """
+        super().add_population(population)
+        for store in self.populations.values():
+            store.merge()
+
+    def commence_annual_cycle(self):
+        """
+        Run the annual cycle in the same order as *Island*:
+            - Feeding
+            - Procreating
+            - Migration
+            - Aging
+            - Death
+
+        and merge cohorts whose members have identical states again.
+
+        |
+
+        """
+        try:
+            self.reset_annual_stats()
+            self.herbivores_feed()
+            self.carnivores_feed()
+            stores = self.living_stores()
+            for store in stores:
+                self.animals_procreate(store)
+            for store in stores:
+                self.animals_migrate(store)
+                self.animals_age(store)
+                self.animals_death(store)
+                store.merge()
+            self.reset_fodder()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while commencing cycle: {}'.format(err))
+
+    def collect_annual_stats(self):
+        """
+        Fill the fitness, age and weight values with one entry per animal.
+
+        |
+
+        """
+        for name, store in self.populations.items():
+            self.fitness_values[name] = store.expand(store.fitness)
+            self.weight_values[name] = store.expand(store.weight)
+            self.age_values[name] = store.expand(store.age)
+
+    def herbivores_feed(self):
+        """
+        Herbivores eat in store order: each one takes *F*, or what is left of the cell's
+        fodder when less than *F* remains. A cohort that runs out of fodder is split into
+        the animals that ate *F*, at most one animal that ate the rest and the animals
+        that found nothing.
+
+        .. seealso::
+            - biosim.animals.Herbivore.feeds()
+
+        |
+
+        """
+        store = self.populations['Herbivore']
+        if store.n_cohorts == 0:
+            return
+        f = store.params.F
+        fodder = self.fodder[store.cell]
+        first = np.cumsum(store.count) - store.count
+        rank = first - first[store.offsets[store.cell]]
+        if f > 0:
+            n_fed = np.floor(fodder / f)
+            rest = fodder - n_fed * f
+        else:
+            n_fed = np.full(len(fodder), np.inf)
+            rest = np.zeros(len(fodder))
+        full = np.clip(n_fed - rank, 0, store.count).astype(np.int64)
+        partial = ((full < store.count) & (n_fed - rank >= 0) & (rest > 0)).astype(np.int64)
+        hungry = store.count - full - partial
+        eaten = np.column_stack((np.full(len(rest), float(f)), rest, np.zeros(len(rest))))
+        count = np.column_stack((full, partial, hungry))
+        self.fodder -= np.bincount(store.cell, weights=(count * eaten).sum(axis=1),
+                                   minlength=len(self.fodder))
+        rows = np.repeat(np.arange(store.n_cohorts), 3)
+        store.take(rows)
+        store.count = count.ravel()
+        store.weight += store.params.beta * eaten.ravel()
+        store.update_fitness()
+        store.compact(store.count > 0)
+
+    def carnivores_feed(self):
+        """
+        Carnivores hunt in order of decreasing fitness, trying herbivores in order of
+        increasing fitness until they have eaten *F* or tried every herbivore in the cell.
+
+        For each herbivore cohort the number of failed attempts before a kill is drawn
+        from a geometric distribution, so a hunter needs one draw per cohort and kill
+        instead of one per herbivore. Carnivores that cannot be fitter than any herbivore
+        in the cell are skipped. A hunter that kills leaves its cohort. As in *Island*,
+        the surviving herbivores of a cell with carnivores stay sorted by fitness.
+
+        .. seealso::
+            - biosim.animals.Carnivore.feeds()
+
+        |
+
+        """
+        herbs = self.populations['Herbivore']
+        carns = self.populations['Carnivore']
+        if herbs.n_cohorts == 0 or carns.n_cohorts == 0:
+            return
+        p = carns.params
+        order = np.arange(herbs.n_cohorts)
+        fed_cell, fed_age, fed_weight = [], [], []
+        occupied = np.flatnonzero((herbs.counts() > 0) & (carns.counts() > 0))
+        for cell in occupied:
+            h_seg = herbs.segment(cell)
+            prey = h_seg.start + np.argsort(herbs.fitness[h_seg], kind='stable')
+            order[h_seg] = prey
+            c_seg = carns.segment(cell)
+            hunters = c_seg.start + np.argsort(-carns.fitness[c_seg], kind='stable')
+            for cohort in hunters:
+                for _ in range(carns.count[cohort]):
+                    alive = prey[herbs.count[prey] > 0]
+                    if len(alive) == 0 or carns.fitness[cohort] <= herbs.fitness[alive[0]]:
+                        break
+                    weight = self.hunt(carns, cohort, herbs, alive, p)
+                    if weight is not None:
+                        carns.count[cohort] -= 1
+                        fed_cell.append(cell)
+                        fed_age.append(carns.age[cohort])
+                        fed_weight.append(weight)
+        herbs.take(order)
+        herbs.compact(herbs.count > 0)
+        carns.append(fed_cell, fed_age, fed_weight)
+        carns.compact(carns.count > 0)
+        carns.sort_by_cell()
+
+    def hunt(self, carns, cohort, herbs, prey, p):
+        """
+        One carnivore of **cohort** hunts the herbivore cohorts **prey**, given in order
+        of increasing fitness. Killed herbivores are removed from their cohorts.
+        Returns the weight of the carnivore after the hunt, or *None* if it killed
+        nothing.
+
+        |
+
+        """
+        weight = None
+        fitness = carns.fitness[cohort]
+        age = np.array([carns.age[cohort]])
+        amount_eaten = 0.
+        for victim in prey:
+            untried = herbs.count[victim]
+            while untried > 0:
+                diff = fitness - herbs.fitness[victim]
+                if diff <= 0:
+                    return weight
+                prob = diff * p.inv_delta_phi_max if diff < p.DeltaPhiMax else 1.
+                attempts = self.rng.geometric(prob)
+                if attempts > untried:
+                    break
+                untried -= attempts
+                herbs.count[victim] -= 1
+                if weight is None:
+                    weight = carns.weight[cohort]
+                weight += p.beta * herbs.weight[victim]
+                fitness = carns.compute_fitness(age, [weight])[0]
+                amount_eaten += herbs.weight[victim]
+                if amount_eaten >= p.F:
+                    return weight
+        return weight
+
+    def animals_procreate(self, store):
+        """
+        The number of births in a cohort is drawn from a binomial distribution with
+        probability ``min(1, gamma * fitness * (N - 1))`` for animals heavier than
+        ``zeta * (w_birth + sigma_birth)``. Mothers that deliver leave their cohort
+        right after it and newborns are appended to the mother's cell.
+
+        .. seealso::
+            - biosim.animals.Animals.procreation()
+
+        |
+
+        """
+        if store.n_cohorts == 0:
+            return
+        p = store.params
+        n = store.counts()[store.cell]
+        prob = np.minimum(1, p.gamma * store.fitness * (n - 1))
+        fertile = (n > 1) & (store.weight >= p.birth_weight_threshold)
+        births = self.rng.binomial(store.count, np.where(fertile, prob, 0.))
+        mothers = np.repeat(np.arange(store.n_cohorts), births)
+        baby_weight = self.rng.normal(p.w_birth, p.sigma_birth, len(mothers))
+        weight_loss = p.xi * baby_weight
+        delivered = store.weight[mothers] >= weight_loss
+        mothers = mothers[delivered]
+        n_cohorts = store.n_cohorts
+        store.count -= np.bincount(mothers, minlength=n_cohorts)
+        store.append(store.cell[mothers], store.age[mothers],
+                     store.weight[mothers] - weight_loss[delivered])
+        store.append(store.cell[mothers], np.zeros(len(mothers)), baby_weight[delivered])
+        position = np.concatenate((np.arange(n_cohorts), mothers + 0.5,
+                                   n_cohorts + np.arange(len(mothers))))
+        store.take(np.argsort(position, kind='stable'))
+        store.compact(store.count > 0)
+        store.sort_by_cell()
+
+    def animals_migrate(self, store):
+        """
+        The migrants of each cohort and their split over the neighbouring cells are drawn
+        with **migration_counts()**, so the cost does not depend on the size of the
+        cohorts. Migrants heading for water stay. As in *Island*, animals staying in a
+        cell keep their order and arrivals are placed after them.
+
+        .. seealso::
+            - Island.animal_migrates()
+            - ColumnarIsland.migration_counts()
+
+        |
+
+        """
+        if store.n_cohorts == 0:
+            return
+        moves = self.migration_counts(store.cell, store.count,
+                                      store.params.mu * store.fitness)
+        destination = self.neighbours[store.cell]
+        n_cohorts = store.n_cohorts
+        stay = store.count - moves.sum(axis=1)
+        store.take(np.concatenate((np.arange(n_cohorts), np.repeat(np.arange(n_cohorts), 4))))
+        store.cell[n_cohorts:] = destination.ravel()
+        store.count = np.concatenate((stay, moves.ravel()))
+        store.compact(store.count > 0)
+        store.sort_by_cell()
+
+    def animals_death(self, store):
+        """
+        Cohorts with no weight die, in the others the number of deaths is drawn from a
+        binomial distribution with probability ``omega * (1 - fitness)``.
+
+        .. seealso::
+            - biosim.animals.Animals.death()
+
+        |
+
+        """
+        prob = np.where(store.weight <= 0, 1., store.params.omega * (1 - store.fitness))
+        store.count -= self.rng.binomial(store.count, np.clip(prob, 0, 1))
+        store.compact(store.count > 0)
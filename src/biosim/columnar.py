@@ -0,0 +1,668 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements a columnar simulation engine for Rossumøya island. Instead of one
+Python object per animal, every species is kept in a *PopulationStore*: a set of NumPy
+columns (age, weight, fitness, flags and cell id) sorted by cell, with segment offsets
+marking where each cell's animals start and end. All phases of the annual cycle are then
+computed as array operations over the whole island.
+
+The engine is selected with ``BioSim(..., engine='columnar')``.
+"""
+
+import numpy as np
+
+from .island import Island
+
+#: Flag bit set on animals that die (or are killed) during the current phase.
+DEAD = 1
+#: Flag bit set on animals that leave their cell during the current migration.
+MOVED = 2
+
+
+class PopulationStore:
+    """
+    Columnar storage of all animals of one species on the island.
+
+    Parameters
+    ----------
+    species : class
+        Animal class (*Herbivore* or *Carnivore*) providing the species parameters.
+    n_cells : int
+        Number of habitable cells on the island.
+
+        |
+
+    Attributes
+    ----------
+    age
+        *ndarray*: Age of each animal, as floats so that non-integer ages are kept.
+    weight
+        *ndarray*: Weight of each animal.
+    fitness
+        *ndarray*: Fitness of each animal.
+    flags
+        *ndarray*: Bit field of per-animal flags such as **DEAD**.
+    cell
+        *ndarray*: Index of the habitable cell each animal lives in.
+    offsets
+        *ndarray*: Segment offsets, animals of cell *i* are stored at
+        ``offsets[i]:offsets[i + 1]``. Only valid after **sort_by_cell()**.
+    chunk_size
+        *int*: Number of animals the phases of the annual cycle process at a time, see
+        **chunks()**, or *None* (default) to process all animals at once.
+
+        |
+
+    """
+
+    #: Names of the per-animal columns.
+    columns = ('age', 'weight', 'fitness', 'flags', 'cell')
+    chunk_size = None
+
+    def __init__(self, species, n_cells):
+        self.species = species
+        self.n_cells = n_cells
+        self.age = np.empty(0, dtype=float)
+        self.weight = np.empty(0, dtype=float)
+        self.fitness = np.empty(0, dtype=float)
+        self.flags = np.empty(0, dtype=np.uint8)
+        self.cell = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(n_cells + 1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.age)
+
+    @property
+    def params(self):
+        """
+        Current *SpeciesParams* of the species.
+
+        |
+
+        """
+        return self.species.params
+
+    def chunks(self):
+        """
+        Returns an iterator over consecutive slices of at most **chunk_size** animals
+        covering the animals in the store when it is called.
+
+        |
+
+        """
+        size = len(self.age)
+        step = self.chunk_size or max(size, 1)
+        return (slice(start, min(start + step, size)) for start in range(0, size, step))
+
+    def append(self, cell, age, weight):
+        """
+        Append animals to the store. Offsets must be rebuilt with **sort_by_cell()**
+        before segments are used again.
+
+        Parameters
+        ----------
+        cell : array_like
+            Cell index of each new animal.
+        age : array_like
+            Age of each new animal.
+        weight : array_like
+            Weight of each new animal.
+
+        |
+
+        """
+        age = np.asarray(age, dtype=float)
+        weight = np.asarray(weight, dtype=float)
+        self.age = np.concatenate((self.age, age))
+        self.weight = np.concatenate((self.weight, weight))
+        self.fitness = np.concatenate((self.fitness, self.compute_fitness(age, weight)))
+        self.flags = np.concatenate((self.flags, np.zeros(len(age), dtype=np.uint8)))
+        self.cell = np.concatenate((self.cell, np.asarray(cell, dtype=np.int64)))
+
+    def compute_fitness(self, age, weight):
+        """
+        Returns the fitness of animals with the given ages and weights.
+
+        .. seealso::
+            - biosim.animals.Animals.calculate_fitness_batch()
+
+        |
+
+        """
+        return self.species.calculate_fitness_batch(age, weight)
+
+    def update_fitness(self, index=None):
+        """
+        Recompute fitness of all animals, or only of the animals at **index** (indices,
+        boolean mask or slice).
+
+        |
+
+        """
+        if index is None:
+            self.fitness = self.compute_fitness(self.age, self.weight)
+        else:
+            self.fitness[index] = self.compute_fitness(self.age[index], self.weight[index])
+
+    def take(self, index):
+        """
+        Keep only the animals selected by **index** (boolean mask or integer indices),
+        in the order given by **index**. Offsets must be rebuilt afterwards.
+
+        |
+
+        """
+        self.age = self.age[index]
+        self.weight = self.weight[index]
+        self.fitness = self.fitness[index]
+        self.flags = self.flags[index]
+        self.cell = self.cell[index]
+
+    def compact(self, keep):
+        """
+        Keep only the animals where the boolean mask **keep** is *True*. The relative
+        order of the remaining animals is preserved, so segment offsets are rebuilt
+        from the cell counts.
+
+        |
+
+        """
+        self.take(keep)
+        self.rebuild_offsets()
+
+    def remove_dead(self):
+        """
+        Remove the animals flagged **DEAD**, keeping the order of the others.
+
+        |
+
+        """
+        self.compact((self.flags & DEAD) == 0)
+
+    def sort_by_cell(self, last=0):
+        """
+        Sort the animals by cell (stable) and rebuild the segment offsets.
+
+        Parameters
+        ----------
+        last : int
+            Flag bit, e.g. **MOVED**. Animals with this bit set are placed after the
+            other animals of their cell, and the bit is cleared.
+
+        |
+
+        """
+        if last:
+            moved = (self.flags & last) != 0
+            self.take(np.argsort(2 * self.cell + moved, kind='stable'))
+            self.flags &= np.uint8(~last & 0xff)
+        else:
+            self.take(np.argsort(self.cell, kind='stable'))
+        self.rebuild_offsets()
+
+    def reorder_segment(self, segment, order):
+        """
+        Reorder the animals of the slice **segment** by the indices **order**, given
+        relative to the start of the segment.
+
+        |
+
+        """
+        for name in self.columns:
+            column = getattr(self, name)
+            column[segment] = column[segment][order]
+
+    def rebuild_offsets(self):
+        """
+        Rebuild the segment offsets of animals already sorted by cell.
+
+        |
+
+        """
+        self.offsets[1:] = np.cumsum(np.bincount(self.cell, minlength=self.n_cells))
+
+    def counts(self):
+        """
+        Returns the number of animals in each cell.
+
+        |
+
+        """
+        return np.bincount(self.cell, minlength=self.n_cells)
+
+    def segment(self, cell):
+        """
+        Returns the slice of the animals living in **cell**.
+
+        |
+
+        """
+        return slice(self.offsets[cell], self.offsets[cell + 1])
+
+
+class ColumnarIsland(Island):
+    """
+    Island model backed by one *PopulationStore* per species.
+
+    It exposes the same interface as *Island* and follows the same annual cycle, but draws
+    its random numbers from the island's NumPy generator, so results are statistically
+    equivalent to the object engine rather than identical for a given seed.
+
+    .. seealso::
+        - biosim.island.Island
+
+    |
+
+    """
+
+    #: Storage class used for each species.
+    store_class = PopulationStore
+    #: If *True*, the annual fitness, age and weight values are only collected when the
+    #: island is visualized, see **collect_annual_stats()**.
+    lazy_stats = False
+
+    def __init__(self, geo, img_dir=None, img_name=None, img_fmt=None, seed=None):
+        super().__init__(geo, img_dir=img_dir, img_name=img_name, img_fmt=img_fmt, seed=seed)
+        self.habitable = list(self.cell_list)
+        self.populations = {name: self.new_store(cls) for name, cls in self.species.items()}
+
+    def new_store(self, species):
+        """
+        Returns an empty store of class **store_class** for **species**.
+
+        |
+
+        """
+        return self.store_class(species, len(self.habitable))
+
+    def use_pool(self, enabled=True, max_size=None):
+        """
+        The columnar engine keeps no animal objects, so there is nothing to pool.
+        Raises *ValueError* if **enabled** is *True*.
+
+        |
+
+        """
+        if enabled:
+            raise ValueError('The columnar engine does not use animal pools')
+
+    def use_dispatch(self, enabled=True, upper=50, lower=25):
+        """
+        The columnar engine processes all cells at once, so there is no strategy to choose.
+        Raises *ValueError* if **enabled** is *True*.
+
+        |
+
+        """
+        if enabled:
+            raise ValueError('The columnar engine does not dispatch per cell')
+
+    def cell_rng(self, cell):
+        """
+        Returns the random generator used for draws in **cell**.
+
+        |
+
+        """
+        return self.rng
+
+    def uniform(self, cell):
+        """
+        Returns one uniform random number in [0, 1) for every entry of **cell**, the
+        cells of the animals the numbers are drawn for, in store order.
+
+        |
+
+        """
+        return self.rng.random(len(cell))
+
+    def integers(self, cell, high):
+        """
+        Returns one random integer in [0, **high**) for every entry of **cell**.
+
+        |
+
+        """
+        return self.rng.integers(0, high, len(cell))
+
+    def normal(self, cell, loc, scale):
+        """
+        Returns one normally distributed random number for every entry of **cell**, the
+        cells of the animals the numbers are drawn for, in store order.
+
+        |
+
+        """
+        return self.rng.normal(loc, scale, len(cell))
+
+    def add_population(self, population):
+        """
+        Add population (herbivores and/or carnivores) to the cells on the island.
+
+        .. seealso::
+                - Island.add_population(population)
+
+        |
+
+        """
+        try:
+            for record in population:
+                loc = tuple(record['loc'])
+                if loc not in self.cell_index:
+                    raise ValueError('Cannot place animals at {}'.format(loc))
+                if any(x['species'] not in self.populations for x in record['pop']):
+                    raise KeyError('Invalid species. Valid keys are: Herbivore and Carnivore')
+                for name, store in self.populations.items():
+                    animals = [x for x in record['pop'] if x['species'] == name]
+                    store.append(np.full(len(animals), self.cell_index[loc]),
+                                 [x['age'] for x in animals], [x['weight'] for x in animals])
+            for store in self.populations.values():
+                store.sort_by_cell()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed to add population in island: {}'.format(err))
+
+    def commence_annual_cycle(self):
+        """
+        Run the annual cycle on all cells at once in the same order as *Island*:
+            - Feeding
+            - Procreating
+            - Migration
+            - Aging
+            - Death
+
+        Species without animals skip their phases, see **living_stores()**.
+
+        |
+
+        """
+        try:
+            self.reset_annual_stats()
+            self.herbivores_feed()
+            self.carnivores_feed()
+            stores = self.living_stores()
+            for store in stores:
+                self.animals_procreate(store)
+            for store in stores:
+                self.animals_migrate(store)
+                self.animals_age(store)
+                self.animals_death(store)
+            self.reset_fodder()
+            if not self.lazy_stats:
+                self.collect_annual_stats()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while commencing cycle: {}'.format(err))
+
+    def collect_annual_stats(self):
+        """
+        Fill the fitness, age and weight values with one entry per animal.
+
+        |
+
+        """
+        for name, store in self.populations.items():
+            self.fitness_values[name] = store.fitness.copy()
+            self.weight_values[name] = store.weight.copy()
+            self.age_values[name] = store.age.copy()
+
+    def update_visualization(self, year, total_years, animal_counts,
+                             cmax_animals, hist_specs, y_max):
+        """
+        Update the graphics, collecting the annual statistics first if **lazy_stats**
+        is set.
+
+        .. seealso::
+            - Island.update_visualization()
+
+        |
+
+        """
+        if self.lazy_stats:
+            self.collect_annual_stats()
+        super().update_visualization(year, total_years, animal_counts,
+                                     cmax_animals, hist_specs, y_max)
+
+    def herbivores_feed(self):
+        """
+        Herbivores eat in store order: each one takes *F*, or what is left of the cell's
+        fodder when less than *F* remains.
+
+        .. seealso::
+            - biosim.animals.Herbivore.feeds()
+
+        |
+
+        """
+        store = self.populations['Herbivore']
+        if len(store) == 0:
+            return
+        f = store.params.F
+        fodder = self.fodder.copy()
+        for chunk in store.chunks():
+            cell = store.cell[chunk]
+            rank = np.arange(chunk.start, chunk.stop) - store.offsets[cell]
+            eaten = np.clip(fodder[cell] - rank * f, 0, f)
+            store.weight[chunk] += store.params.beta * eaten
+            store.update_fitness(chunk)
+            self.fodder -= np.bincount(cell, weights=eaten, minlength=len(self.fodder))
+
+    def carnivores_feed(self):
+        """
+        Carnivores hunt in order of decreasing fitness, trying herbivores in order of
+        increasing fitness until they have eaten *F* or tried every herbivore in the cell.
+
+        All uniform draws of a carnivore are made up front; after each kill its fitness is
+        recomputed and the search continues with the remaining draws. Since herbivores are
+        sorted by fitness, each search only covers the herbivores less fit than the
+        carnivore, found by binary search. As in *Island*, the surviving herbivores of a
+        cell with carnivores stay sorted by fitness.
+
+        This phase is not vectorized across carnivores: every kill changes the prey left
+        for the next carnivore and the fitness of the hunter, so cells and carnivores are
+        visited in a Python loop. Its cost grows with the number of carnivores, also in
+        *BatchIsland*, which hunts in every cell of every replicate.
+
+        .. seealso::
+            - biosim.animals.Carnivore.feeds()
+
+        |
+
+        """
+        herbs = self.populations['Herbivore']
+        carns = self.populations['Carnivore']
+        if len(herbs) == 0 or len(carns) == 0:
+            return
+        p = carns.params
+        occupied = np.flatnonzero((herbs.counts() > 0) & (carns.counts() > 0))
+        for cell in occupied:
+            rng = self.cell_rng(cell)
+            h_seg = herbs.segment(cell)
+            herbs.reorder_segment(h_seg, np.argsort(herbs.fitness[h_seg], kind='stable'))
+            prey = np.arange(h_seg.start, h_seg.stop)
+            c_seg = carns.segment(cell)
+            hunters = c_seg.start + np.argsort(-carns.fitness[c_seg], kind='stable')
+            for hunter in hunters:
+                if len(prey) == 0:
+                    break
+                draws = rng.random(len(prey))
+                fitness = herbs.fitness[prey]
+                killed = np.zeros(len(prey), dtype=bool)
+                amount_eaten = 0.
+                start = 0
+                while True:
+                    # Prey are sorted by fitness, only those less fit than the hunter can die
+                    stop = fitness.searchsorted(carns.fitness[hunter])
+                    if start >= stop:
+                        break
+                    diff = carns.fitness[hunter] - fitness[start:stop]
+                    prob = np.where(diff < p.DeltaPhiMax, diff * p.inv_delta_phi_max, 1.)
+                    hits = np.flatnonzero(prob > draws[start:stop])
+                    if len(hits) == 0:
+                        break
+                    victim = start + hits[0]
+                    killed[victim] = True
+                    eaten = herbs.weight[prey[victim]]
+                    carns.weight[hunter] += p.beta * eaten
+                    carns.update_fitness(hunter)
+                    amount_eaten += eaten
+                    if amount_eaten >= p.F:
+                        break
+                    start = victim + 1
+                herbs.flags[prey[killed]] |= DEAD
+                prey = prey[~killed]
+        herbs.remove_dead()
+
+    def animals_procreate(self, store):
+        """
+        Every animal heavier than ``zeta * (w_birth + sigma_birth)`` gives birth with
+        probability ``min(1, gamma * fitness * (N - 1))``. Newborns are appended to the
+        mother's cell and do not take part in this year's procreation.
+
+        .. seealso::
+            - biosim.animals.Animals.procreation()
+
+        |
+
+        """
+        if len(store) == 0:
+            return
+        p = store.params
+        counts = store.counts()
+        for chunk in store.chunks():
+            cell = store.cell[chunk]
+            n = counts[cell]
+            prob = np.minimum(1, p.gamma * store.fitness[chunk] * (n - 1))
+            fertile = (n > 1) & (store.weight[chunk] >= p.birth_weight_threshold)
+            births = chunk.start + np.flatnonzero(fertile & (prob > self.uniform(cell)))
+            baby_weight = self.normal(store.cell[births], p.w_birth, p.sigma_birth)
+            weight_loss = p.xi * baby_weight
+            delivered = store.weight[births] >= weight_loss
+            mothers = births[delivered]
+            store.weight[mothers] -= weight_loss[delivered]
+            store.update_fitness(mothers)
+            store.append(store.cell[mothers], np.zeros(len(mothers)), baby_weight[delivered])
+
+    def animals_migrate(self, store):
+        """
+        Every animal migrates with probability ``mu * fitness`` to one of its four
+        neighbouring cells chosen at random, unless that cell is water. As in *Island*,
+        animals staying in a cell keep their order and arrivals are placed after them.
+        Animals differ in fitness and keep their own state, so each draws its own
+        decision; engines with groups of identical animals use **migration_counts()**.
+
+        .. seealso::
+            - Island.animal_migrates()
+
+        |
+
+        """
+        if len(store) == 0:
+            return
+        for chunk in store.chunks():
+            cell = store.cell[chunk]
+            movers = store.params.mu * store.fitness[chunk] > self.uniform(cell)
+            direction = self.integers(cell, 4)
+            destination = self.neighbours[cell, direction]
+            movers &= self.neighbour_mask[cell, direction]
+            store.cell[chunk][movers] = destination[movers]
+            store.flags[chunk][movers] |= MOVED
+        store.sort_by_cell(MOVED)
+
+    def migration_counts(self, cell, count, probability):
+        """
+        Returns the number of migrants in each of the four directions, an array of shape
+        (groups, 4), for groups of **count** identical animals living in **cell** and
+        migrating with **probability** ``mu * fitness``.
+
+        The number of migrants of each group is drawn from a binomial distribution and
+        spread over the four directions of **neighbours** with a multinomial
+        distribution: two draws per group, however large it is. Migrants heading for
+        water stay, so their entries are zero.
+
+        .. seealso::
+            - biosim.animals.Animals.migration()
+            - Island.build_tables()
+
+        |
+
+        """
+        movers = self.rng.binomial(count, np.minimum(probability, 1))
+        moves = self.rng.multinomial(movers, [0.25] * 4)
+        moves[~self.neighbour_mask[cell]] = 0
+        return moves
+
+    @staticmethod
+    def animals_age(store):
+        """
+        Increase the age of every animal by one year and reduce its weight by *eta*.
+
+        .. seealso::
+            - biosim.animals.Animals.commence_aging()
+
+        |
+
+        """
+        for chunk in store.chunks():
+            store.age[chunk] += 1
+            store.weight[chunk] -= store.weight[chunk] * store.params.eta
+            store.update_fitness(chunk)
+
+    def animals_death(self, store):
+        """
+        Animals with no weight die, the others die with probability ``omega * (1 - fitness)``.
+
+        .. seealso::
+            - biosim.animals.Animals.death()
+
+        |
+
+        """
+        for chunk in store.chunks():
+            prob = store.params.omega * (1 - store.fitness[chunk])
+            dies = (store.weight[chunk] <= 0) | (prob > self.uniform(store.cell[chunk]))
+            store.flags[chunk][dies] |= DEAD
+        store.remove_dead()
+
+    def get_total_species_count(self):
+        """
+        Returns a dictionary with counts of herbivores and carnivores on the island.
+
+        |
+
+        """
+        return {name: len(store) for name, store in self.populations.items()}
+
+    def get_total_animal_count(self):
+        """
+        Returns the total number of animals on the island.
+
+        |
+
+        """
+        return sum(len(store) for store in self.populations.values())
+
+    def living_stores(self):
+        """
+        Returns the stores of the species that have animals on the island. The phases of
+        the other species are skipped, as they would not draw or change anything.
+
+        |
+
+        """
+        return [store for store in self.populations.values() if len(store) > 0]
+
+    def get_distributions(self):
+        """
+        Get cell wise distribution for distributions graph
+
+        |
+
+        """
+        distributions = []
+        for name in ('Herbivore', 'Carnivore'):
+            dist = np.zeros(self.landscape.shape, dtype=np.int64)
+            counts = self.populations[name].counts()
+            for cell, count in zip(self.habitable, counts):
+                dist[cell.loc[0] - 1, cell.loc[1] - 1] = count
+            distributions.append(dist.tolist())
+        return tuple(distributions)
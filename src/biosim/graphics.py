@@ -45,7 +45,8 @@ class Graphics:
         self._map_legend_ax = None
         self.year_template = 'Year: {:5d}'
         self._gs = None
-        self.cell_list = []
+        self.grid = []
+        self.distributions = ([], [])
         self.img_dir = img_dir
 
         if self.img_dir is None:
@@ -155,14 +156,18 @@ class Graphics:
             self._map_legend_ax.text(i * 0.25, 0.2, name, transform=self._map_legend_ax.transAxes)
 
     def update_visualization(self, year, total_years, cmax_animals, hist_specs, y_max,
-                             herbivore_data, carnivore_data, cell_list):
+                             herbivore_data, carnivore_data, grid):
         """
-            Updates graphics based on current state of the simulation
+            Updates graphics based on current state of the simulation. **grid** is the
+            row/column index of the island's cells, see *Island.grid*. The number of animals
+            reported for a clicked cell is read from the distributions, which every engine
+            fills, not from the cell objects.
 
         |
 
         """
-        self.cell_list = cell_list
+        self.grid = grid
+        self.distributions = (herbivore_data["distribution"], carnivore_data["distribution"])
         self.update_number_of_species_graph(False, year, total_years, herbivore_data["count"],
                                             carnivore_data["count"], y_max)
         self.update_distribution_map(herbivore_data["distribution"],
@@ -325,15 +330,19 @@ class Graphics:
 
     def on_press(self, event):
         if event.inaxes == self.geography_ax:
-            loc = (int(event.ydata) + 1, int(event.xdata) + 1)
-            cell = next((cl for cl in self.cell_list if cl.loc[0] == int(event.ydata) + 1
-                         and cl.loc[1] == int(event.xdata) + 1), None)
+            row, col = int(event.ydata + 0.5), int(event.xdata + 0.5)
+            if not (0 <= row < len(self.grid) and 0 <= col < len(self.grid[row])):
+                return
+            loc = (row + 1, col + 1)
+            cell = self.grid[row][col]
             if cell is not None:
+                herbivores, carnivores = (dist[row][col] for dist in self.distributions)
                 txt = "Location:" + str(loc) + "    Cell Type:"\
                       + str(cell.__class__.__name__) +\
-                      "    Herbivores:" + str(
-                    len(cell.herbivores)) + "    Carnivores:" + str(len(cell.carnivores))
-                self.selected_cell_ax_txt.set_text(txt)
+                      "    Herbivores:" + str(herbivores) + "    Carnivores:" + str(carnivores)
+            else:
+                txt = "Location:" + str(loc) + "    Cell Type:Water"
+            self.selected_cell_ax_txt.set_text(txt)
 
     def make_movie(self, movie_fmt=None):
         """
@@ -9,8 +9,10 @@ This module implements the Island class that models the complete geography of Ro
             Figure 1: Geography of Rossumøya island in *check_sim.py*
 """
 
-from .cells import Water, Lowland, Highland, Desert, set_cell_params, update_animal_params
+from .cells import Cell, LANDSCAPES, set_cell_params, update_animal_params
+from .animals import Herbivore, Carnivore, AnimalPool, CAN_MIGRATE
 import random
+import numpy as np
 from .graphics import Graphics
 
 
@@ -28,11 +30,97 @@ class Island:
         Filenames of images.
     img_fmt : str
         File format of the image.
+    seed : int
+        Seed for the island's random generators **random** and **rng**.
 
         |
 
     Attributes
     ----------
+    species
+        *dict*: Animal classes of this island by species name, derived from the
+        module-level *Herbivore* and *Carnivore* so their parameters belong to this island.
+
+        |
+
+    landscapes
+        *dict*: Cell classes of this island by code letter, derived from the module-level
+        landscape classes so their *f_max* belongs to this island.
+
+        |
+
+    landscape
+        *ndarray*: Landscape code letter of every square of the map, one row per map row.
+
+        |
+
+    map_rgb
+        *list*: Colour of every square of the map, built from **landscape**.
+
+        |
+
+    cell_list
+        *list*: Cell objects of the squares that allow animals, in row-major order.
+        Water has no cell objects.
+
+        |
+
+    grid
+        *list*: Row/column index of the map: ``grid[row - 1][col - 1]`` is the cell at
+        location (row, col), or *None* for water. See **get_cell()**.
+
+        |
+
+    cell_index
+        *dict*: Index in **cell_list** of every cell, by location.
+
+        |
+
+    neighbours
+        *ndarray*: Neighbour table of shape (cells, 4): ``neighbours[i, d]`` is the index in
+        **cell_list** of the cell an animal in ``cell_list[i]`` reaches by migrating in
+        direction *d*, in the order of *Cell.get_migration_possibilities()*, or -1 for
+        water. See **build_tables()**.
+
+        |
+
+    neighbour_mask
+        *ndarray*: Boolean table of the same shape as **neighbours**, *True* where the
+        neighbour allows animals.
+
+        |
+
+    fodder
+        *ndarray*: Fodder left in each cell of **cell_list**. The cells keep their
+        *food_status* in this array.
+
+        |
+
+    fodder_max
+        *ndarray*: *f_max* of each cell of **cell_list**, from its landscape type. The
+        fodder is reset to it at the end of every year, see **reset_fodder()**.
+
+        |
+
+    active
+        *set*: Cells that may hold animals. Cells are added when animals are placed in
+        them, also directly with *Cell.add_animal()*, or migrate into them, and dropped
+        at the end of a year in which they end up empty. Only active cells take part in
+        the annual cycle. The cells hold a reference to this set, so it is updated in
+        place and never replaced.
+
+        |
+
+    random
+        *random.Random*: Generator used by the animals and migration of this island.
+
+        |
+
+    rng
+        *numpy.random.Generator*: Generator used by the vectorized engines.
+
+        |
+
     fitness_values
         *dict*: Dictionary with keys 'Herbivore' and 'Carnivore' indicating type of animal.
         Each key corresponds to a list of fitness values for every animal on the island
@@ -54,12 +142,38 @@ class Island:
 
         |
 
+    dispatch
+        *tuple*: Population thresholds (lower, upper) for the choice of cell strategy, or
+        *None* (default) to process every cell with the object strategy.
+        See **use_dispatch()**.
+
+        |
+
+    strategy_counts
+        *dict*: Number of cell-years processed with each strategy, and number of
+        switches between strategies, since dispatch was enabled.
+
+        |
+
     """
 
-    def __init__(self, geo, img_dir=None, img_name=None, img_fmt=None):
+    def __init__(self, geo, img_dir=None, img_name=None, img_fmt=None, seed=None):
         self.geo = geo
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.species = {'Herbivore': Herbivore.derive(self.random),
+                        'Carnivore': Carnivore.derive(self.random)}
+        self.landscapes = {code: cls.derive(self.species) for code, cls in LANDSCAPES.items()}
+        self.landscape = np.empty((0, 0), dtype='U1')
         self.map_rgb = []
         self.cell_list = []
+        self.grid = []
+        self.cell_index = {}
+        self.neighbours = np.empty((0, 4), dtype=np.int64)
+        self.neighbour_mask = np.empty((0, 4), dtype=bool)
+        self.fodder = np.empty(0)
+        self.fodder_max = np.empty(0)
+        self.active = set()
         self.add_cells()
         self.graphics = Graphics(img_dir, img_name, img_fmt)
         self.fitness_values = {"Herbivore": [],
@@ -68,10 +182,14 @@ class Island:
                            "Carnivore": []}
         self.weight_values = {"Herbivore": [],
                               "Carnivore": []}
+        self.dispatch = None
+        self.strategy_counts = {}
 
     def add_cells(self):
         """
-        Add cells to the Island model.
+        Read the landscape code array from the map, add cells for the squares that
+        allow animals to the Island model, index them in **grid**, build the migration
+        tables and the fodder arrays.
 
         |
 
@@ -79,39 +197,84 @@ class Island:
         try:
             map_list = self.geo.splitlines()
             rows = len(map_list)
+            codes = []
             for row in range(1, rows + 1):
-                rgb_cells_in_row = []
                 line = map_list[row - 1].strip()
                 chars = len(line)
                 if row > 1 and chars != len(map_list[row - 2]):
                     raise ValueError('Inconsistent row length')
+                grid_row = []
 
                 for col in range(1, chars + 1):
                     land_type = line[col - 1]
                     if (row == 1 or row == rows or col == 1 or col == chars) \
                             and land_type != 'W':
                         raise ValueError('Cannot have non ocean boundry')
-                    loc = (row, col)
-                    if land_type == 'W':
-                        cell = Water(loc)
-                    elif land_type == 'H':
-                        cell = Highland(loc)
-                    elif land_type == 'L':
-                        cell = Lowland(loc)
-                    elif land_type == 'D':
-                        cell = Desert(loc)
-                    else:
+                    if land_type not in self.landscapes:
                         raise ValueError('Cannot Identify Land Type')
-                    rgb_cells_in_row.append(cell.rgb)
-                    self.cell_list.append(cell)
-                self.map_rgb.append(rgb_cells_in_row)
+                    cell = None
+                    if self.landscapes[land_type].allows_animal:
+                        cell = self.landscapes[land_type]((row, col))
+                        self.cell_list.append(cell)
+                    grid_row.append(cell)
+                codes.append(list(line))
+                self.grid.append(grid_row)
+            self.landscape = np.array(codes, dtype='U1').reshape(rows, len(codes[0]) if rows else 0)
+            rgb = {code: cls.rgb for code, cls in self.landscapes.items()}
+            self.map_rgb = [[rgb[code] for code in row] for row in self.landscape.tolist()]
+            self.build_tables()
+            self.fodder_max = np.array([cell.f_max for cell in self.cell_list], dtype=float)
+            self.fodder = self.fodder_max.copy()
+            for index, cell in enumerate(self.cell_list):
+                cell.bind_fodder(self.fodder, index)
+                cell.bind_active(self.active)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed to add cells in island: {}'.format(err))
 
-    @staticmethod
-    def update_cell_params(landscape, params):
+    def build_tables(self):
         """
-        Update default parameters of cells.
+        Build **cell_index** and the migration tables **neighbours** and
+        **neighbour_mask** from the cells of the map. The tables only depend on the map,
+        so they are built once when the map is read and reused every year.
+
+        .. code-block:: python
+
+            island = Island(map)
+            index = island.cell_index[(10, 10)]
+            reachable = island.neighbours[index][island.neighbour_mask[index]]
+
+
+        |
+
+        """
+        self.cell_index = {cell.loc: index for index, cell in enumerate(self.cell_list)}
+        self.neighbours = np.array([[self.cell_index.get(loc, -1)
+                                     for loc in cell.get_migration_possibilities()]
+                                    for cell in self.cell_list], dtype=np.int64).reshape(-1, 4)
+        self.neighbour_mask = self.neighbours >= 0
+
+    def get_cell(self, loc):
+        """
+        Returns the cell at location **loc** = (row, col), counted from (1, 1), or *None*
+        if the location is water or outside the map.
+
+        .. code-block:: python
+
+            island = Island(map)
+            cell = island.get_cell((10, 10))
+
+
+        |
+
+        """
+        row, col = loc[0] - 1, loc[1] - 1
+        if 0 <= row < len(self.grid) and 0 <= col < len(self.grid[row]):
+            return self.grid[row][col]
+        return None
+
+    def update_cell_params(self, landscape, params):
+        """
+        Update parameters of the cells on this island.
 
         Parameters
         ----------
@@ -135,12 +298,12 @@ class Island:
         |
 
         """
-        set_cell_params(landscape, params)
+        set_cell_params(landscape, params, self.landscapes)
+        self.fodder_max[:] = [cell.f_max for cell in self.cell_list]
 
-    @staticmethod
-    def update_animal_params(species, params):
+    def update_animal_params(self, species, params):
         """
-        Update default characteristics of animals.
+        Update characteristics of the animals on this island.
 
         .. seealso::
                 - biosim.cells.update_animal_params(species, params)
@@ -157,7 +320,128 @@ class Island:
         |
 
         """
-        update_animal_params(species, params)
+        update_animal_params(species, params, self.species)
+
+    def use_pool(self, enabled=True, max_size=None):
+        """
+        Recycle dead animals of this island as newborns through one *AnimalPool* per
+        species, or stop doing so. Results for a given seed are the same either way.
+
+        Parameters
+        ----------
+        enabled : bool
+            *True* to give each species a new, empty pool, *False* to remove the pools.
+        max_size : int
+            Maximum number of free animals kept per species, or *None* for no limit.
+
+
+        .. code-block:: python
+
+            island = Island(map)
+            island.use_pool()
+            island.commence_annual_cycle()
+            print(island.pool_stats())
+
+
+        |
+
+        """
+        for cls in self.species.values():
+            cls.pool = AnimalPool(cls, max_size) if enabled else None
+
+    def pool_stats(self):
+        """
+        Returns a dictionary with the hit and miss counters of the pool of each species,
+        or an empty dictionary if pooling is disabled.
+
+            .. seealso::
+                - biosim.animals.AnimalPool.stats()
+
+        |
+
+        """
+        return {name: cls.pool.stats() for name, cls in self.species.items()
+                if cls.pool is not None}
+
+    def use_dispatch(self, enabled=True, upper=50, lower=25):
+        """
+        Choose the processing strategy of each cell every year from its number of
+        animals, or process all cells with the object strategy again.
+
+        A cell switches from the *'object'* to the *'vector'* strategy when it holds at
+        least **upper** animals at the start of a year, and back when it holds fewer than
+        **lower**. The gap between the thresholds keeps cells whose population hovers
+        around a threshold from switching every year. The vector strategy draws from
+        **rng** instead of the species generators, so results depend on the thresholds.
+
+        Parameters
+        ----------
+        enabled : bool
+            *True* to choose strategies per cell, *False* to go back to the object strategy.
+        upper : int
+            Number of animals from which a cell uses the vector strategy.
+        lower : int
+            Number of animals below which a vector cell uses the object strategy again.
+            Must not exceed **upper**.
+
+            .. seealso::
+                - biosim.cells.Cell.carnivores_feed_vector()
+
+
+        .. code-block:: python
+
+            island = Island(map)
+            island.use_dispatch(upper=100, lower=60)
+            island.commence_annual_cycle()
+            print(island.dispatch_stats())
+
+
+        |
+
+        """
+        if not enabled:
+            self.dispatch = None
+            self.strategy_counts = {}
+            for cell in self.cell_list:
+                cell.strategy = 'object'
+            return
+        if type(upper) is not int or type(lower) is not int:
+            raise ValueError('Dispatch thresholds must be integers')
+        if not 0 <= lower <= upper:
+            raise ValueError('Dispatch thresholds must satisfy 0 <= lower <= upper')
+        self.dispatch = (lower, upper)
+        self.strategy_counts = {'object': 0, 'vector': 0, 'switches': 0}
+
+    def dispatch_stats(self):
+        """
+        Returns a dictionary with the number of cell-years processed with each strategy and
+        the number of strategy switches, or an empty dictionary if dispatch is disabled.
+
+        |
+
+        """
+        return dict(self.strategy_counts)
+
+    def select_strategies(self):
+        """
+        Set the strategy of every active cell for this year from its number of animals
+        and the thresholds in **dispatch**, and count the choices in **strategy_counts**.
+
+        |
+
+        """
+        if self.dispatch is None:
+            return
+        lower, upper = self.dispatch
+        for cell in self.active_cells():
+            n = len(cell.herbivores) + len(cell.carnivores)
+            if cell.strategy == 'object' and n >= upper:
+                cell.strategy = 'vector'
+                self.strategy_counts['switches'] += 1
+            elif cell.strategy == 'vector' and n < lower:
+                cell.strategy = 'object'
+                self.strategy_counts['switches'] += 1
+            self.strategy_counts[cell.strategy] += 1
 
     def add_population(self, population):
         """
@@ -195,9 +479,11 @@ class Island:
             for record in population:
                 loc = record['loc']
                 animals = record['pop']
-                cell = next((item for item in self.cell_list if item.loc[0] == loc[0]
-                             and item.loc[1] == loc[1]), None)
+                cell = self.get_cell(loc)
                 if cell is None:
+                    if 0 < loc[0] <= self.landscape.shape[0] and \
+                            0 < loc[1] <= self.landscape.shape[1]:
+                        raise ValueError('Cannot place animals at {}'.format(loc))
                     raise RuntimeError("Cell Not Found!", cell)
                 cell.add_animal(animals)
         except RuntimeError as err:
@@ -209,15 +495,18 @@ class Island:
             - Feeding
             - Procreating
             - Migration
-            - Aging
-            - Death
+            - Aging and death
+
+        Only active cells are processed, each with its strategy for the year, see
+        **active** and **use_dispatch()**. Carnivores only hunt if there are any on the
+        island, and cells skip the phases of a species they do not hold.
 
                .. seealso::
-                       - biosim.cells.animals_feed()
+                       - Island.herbivores_feed()
+                       - biosim.cells.carnivores_feed()
                        - biosim.cells.animals_procreate()
                        - Island.animal_migrates()
-                       - biosim.cells.animals_age()
-                       - biosim.cells.animals_death()
+                       - biosim.cells.animals_age_and_die()
 
 
         .. code-block:: python
@@ -236,43 +525,87 @@ class Island:
         """
         try:
             self.reset_annual_stats()
-            for cell in self.cell_list:
-                if not cell.allows_animal:
-                    continue
-                cell.animals_feed()
-
-            for cell in self.cell_list:
-                if not cell.allows_animal:
-                    continue
-                baby_herbivores, baby_carnivores = cell.animals_procreate(len(cell.herbivores),
-                                                                          len(cell.carnivores))
+            self.select_strategies()
+            cells = self.active_cells()
+            self.herbivores_feed(cells)
+            if any(cell.carnivores for cell in cells):
+                for cell in cells:
+                    if cell.strategy == 'vector':
+                        cell.carnivores_feed_vector(self.rng)
+                    else:
+                        cell.carnivores_feed()
+
+            for cell in cells:
+                if cell.strategy == 'vector':
+                    baby_herbivores, baby_carnivores = cell.animals_procreate_vector(self.rng)
+                else:
+                    baby_herbivores, baby_carnivores = cell.animals_procreate(
+                        len(cell.herbivores), len(cell.carnivores))
                 cell.herbivores.extend(baby_herbivores)
                 cell.carnivores.extend(baby_carnivores)
 
-            for cell in self.cell_list:
-                if not cell.allows_animal:
-                    continue
-                self.animal_migrates(cell)
-
-            for cell in self.cell_list:
-                if not cell.allows_animal:
-                    continue
-                cell.animals_age()
-
-            for cell in self.cell_list:
-                if not cell.allows_animal:
-                    continue
-                cell.animals_death()
-                cell.reset_cell()
-                self.fitness_values["Herbivore"].extend([o.fitness for o in cell.herbivores])
-                self.fitness_values["Carnivore"].extend([o.fitness for o in cell.carnivores])
-                self.weight_values["Herbivore"].extend([o.weight for o in cell.herbivores])
-                self.weight_values["Carnivore"].extend([o.weight for o in cell.carnivores])
-                self.age_values["Herbivore"].extend([o.age for o in cell.herbivores])
-                self.age_values["Carnivore"].extend([o.age for o in cell.carnivores])
+            self.animal_migrates(cells)
+
+            cells = self.active_cells()
+            for cell in cells:
+                if cell.strategy == 'vector':
+                    stats = cell.animals_age_and_die_vector(self.rng)
+                else:
+                    stats = cell.animals_age_and_die()
+                for name, (fitness, weight, age) in stats.items():
+                    self.fitness_values[name].extend(fitness.tolist())
+                    self.weight_values[name].extend(weight.tolist())
+                    self.age_values[name].extend(age.tolist())
+            self.reset_fodder()
+            self.active.difference_update([cell for cell in cells
+                                           if not (cell.herbivores or cell.carnivores)])
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while commencing cycle: {}'.format(err))
 
+    def active_cells(self):
+        """
+        Returns the active cells in row-major order, the order of **cell_list**.
+
+        |
+
+        """
+        return sorted(self.active, key=lambda cell: cell.loc)
+
+    def herbivores_feed(self, cells):
+        """
+        Herbivores of **cells** graze, all cells at once. Within each cell herbivores eat
+        in list order: each one takes *F*, or what is left of the cell's fodder when less
+        than *F* remains, as in *Herbivore.feeds()*. Weights and fitness are then
+        updated in one batch.
+
+        .. seealso::
+            - biosim.animals.Herbivore.feeds()
+            - biosim.cells.Cell.graze()
+            - biosim.cells.Cell.set_state()
+
+        |
+
+        """
+        herbivores = [animal for cell in cells for animal in cell.herbivores]
+        if len(herbivores) == 0:
+            return
+        species = self.species['Herbivore']
+        index = [self.cell_index[cell.loc] for cell in cells]
+        eaten, self.fodder[index] = Cell.graze(self.fodder[index],
+                                               [len(cell.herbivores) for cell in cells],
+                                               species.params.F)
+        Cell.set_state(species, herbivores,
+                       weight=Cell.state(herbivores, 'weight') + species.params.beta * eaten)
+
+    def reset_fodder(self):
+        """
+        Reset the fodder of every cell to its *f_max* with one copy of **fodder_max**.
+
+        |
+
+        """
+        self.fodder[:] = self.fodder_max
+
     def reset_annual_stats(self):
         """
         Reset Island attributes to intial values.
@@ -287,52 +620,94 @@ class Island:
         self.weight_values = {"Herbivore": [],
                               "Carnivore": []}
 
-    def animal_migrates(self, cell):
+    def animal_migrates(self, cells):
         """
         Migration of animals that can migrate to cells that allow animals to enter.
+        Destinations are looked up in **neighbours** and **neighbour_mask**.
+
+        Migration runs in two phases. First every animal of **cells** decides whether and
+        where it moves, and movers are staged in one buffer per destination cell. Then
+        each source cell keeps only the animals that stay, in their order, and the
+        buffers are appended to their destinations. Animals arriving in a cell are thus
+        never considered for migration again in the same year.
 
                .. seealso::
-                       - biosim.cells.get_migration_possibilities()
+                       - Island.build_tables()
                        - biosim.animals.Animals.migration()
 
+
+        .. code-block:: python
+
+            island = Island(map)
+            island.add_population(ini_herbs)
+            island.animal_migrates(island.active_cells())
+
+
         |
 
         """
         try:
-            for animal in cell.herbivores + cell.carnivores:
-                if animal.has_migrated:
-                    continue
-                animal.migration()
-                if animal.can_migrate:
-                    possible_locations = cell.get_migration_possibilities()
-                    migration_destination = self.get_random_cell(possible_locations)
-                    migrating_cell = next((item for item in self.cell_list
-                                           if item.loc[0] == migration_destination[0]
-                                           and item.loc[1] == migration_destination[1]), None)
-                    if migrating_cell is None:
-                        raise RuntimeError("Cell Not Found!", cell)
-                    if not migrating_cell.allows_animal:
-                        continue
-                    else:
-                        animal.has_migrated = True
-                        if animal.__class__.__name__ == 'Herbivore':
-                            migrating_cell.herbivores.append(animal)
-                            cell.herbivores.pop(cell.herbivores.index(animal))
-                        elif animal.__class__.__name__ == 'Carnivore':
-                            migrating_cell.carnivores.append(animal)
-                            cell.carnivores.pop(cell.carnivores.index(animal))
+            staged = {}
+            stayers = []
+            for cell in cells:
+                index = self.cell_index[cell.loc]
+                destinations = self.neighbours[index].tolist()
+                allowed = self.neighbour_mask[index].tolist()
+                stay = ([], [])
+                moved = False
+                for kind, animals in enumerate((cell.herbivores, cell.carnivores)):
+                    for animal in animals:
+                        animal.migration()
+                        if animal.flags & CAN_MIGRATE:
+                            direction = self.random.randint(0, 3)
+                            if allowed[direction]:
+                                buffer = staged.setdefault(destinations[direction], ([], []))
+                                buffer[kind].append(animal)
+                                moved = True
+                                continue
+                        stay[kind].append(animal)
+                if moved:
+                    stayers.append((cell, stay))
+
+            for cell, (herbivores, carnivores) in stayers:
+                cell.herbivores[:] = herbivores
+                cell.carnivores[:] = carnivores
+            for index, (herbivores, carnivores) in staged.items():
+                migrating_cell = self.cell_list[index]
+                migrating_cell.herbivores.extend(herbivores)
+                migrating_cell.carnivores.extend(carnivores)
+                self.active.add(migrating_cell)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed during migration: {}'.format(err))
         return None
 
-    @staticmethod
-    def get_random_cell(possibilities):
-        _dir = random.randint(0, 3)
-        return possibilities[_dir]
+    def get_random_cell(self, possibilities):
+        """
+        Returns one of the four **possibilities** drawn with the island random generator,
+        the same draw that picks a direction in migration. Kept for callers of the
+        location based API; migration itself looks up **neighbours** by index.
+
+               .. seealso::
+                       - biosim.cells.Cell.get_migration_possibilities()
+                       - Island.animal_migrates()
+
+
+        .. code-block:: python
+
+            island = Island(map)
+            cell = island.get_cell((10, 10))
+            loc = island.get_random_cell(cell.get_migration_possibilities())
+
+
+        |
+
+        """
+        return possibilities[self.random.randint(0, 3)]
 
     def get_total_species_count(self):
         """
         Returns a dictionary with counts of herbivores and carnivores on the island.
+        Only the active cells are visited, since every other cell is empty.
 
         .. code-block:: python
 
@@ -357,13 +732,14 @@ class Island:
         |
 
         """
-        total_herbivores = sum(len(c.herbivores) for c in self.cell_list)
-        total_carnivores = sum(len(c.carnivores) for c in self.cell_list)
+        total_herbivores = sum(len(c.herbivores) for c in self.active)
+        total_carnivores = sum(len(c.carnivores) for c in self.active)
         return {'Herbivore': total_herbivores, 'Carnivore': total_carnivores}
 
     def get_total_animal_count(self):
         """
-        Returns the total number of animals on the island.
+        Returns the total number of animals on the island, counted over the active
+        cells.
 
 
         .. code-block:: python
@@ -388,7 +764,7 @@ class Island:
         |
 
         """
-        total_animals = sum(len(c.herbivores) + len(c.carnivores) for c in self.cell_list)
+        total_animals = sum(len(c.herbivores) + len(c.carnivores) for c in self.active)
         return total_animals
 
     def setup_visualization(self, total_years, cmax, hist_specs, y_max, img_years):
@@ -425,9 +801,9 @@ class Island:
 
         """
         try:
-            map = self.geo.splitlines()
-            herb_dist = [[0] * len(map[0].strip()) for i in range(len(map))]
-            carn_dist = [[0] * len(map[0].strip()) for i in range(len(map))]
+            rows, cols = self.landscape.shape
+            herb_dist = [[0] * cols for _ in range(rows)]
+            carn_dist = [[0] * cols for _ in range(rows)]
             self.graphics.setup_visualization(total_years,
                                               cmax, hist_specs, y_max,
                                               img_years, self.map_rgb,
@@ -489,7 +865,7 @@ class Island:
                 "distribution": carnivore_dist
             }
             self.graphics.update_visualization(year, total_years, cmax_animals, hist_specs, y_max,
-                                               herbivore_date, carnivore_date, self.cell_list)
+                                               herbivore_date, carnivore_date, self.grid)
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while updating graphics: {}'.format(err))
 
@@ -501,26 +877,12 @@ class Island:
 
         """
         try:
-            map_list = self.geo.splitlines()
-            rows = len(map_list)
-            herbivore_dist = []
-            carnivore_dist = []
-            for x in range(rows):
-                row_list_carnivore = []
-                row_list_herbivore = []
-                line = map_list[x].strip()
-                chars = len(line)
-                for y in range(chars):
-                    loc = (x + 1, y + 1)
-                    cell = next((item for item in self.cell_list if item.loc[0] == loc[0] and
-                                 item.loc[1] == loc[1]), None)
-                    if cell is None:
-                        raise RuntimeError("Cell Not Found!", cell)
-                    row_list_herbivore.append(len(cell.herbivores))
-                    row_list_carnivore.append(len(cell.carnivores))
-                herbivore_dist.append(row_list_herbivore)
-                carnivore_dist.append(row_list_carnivore)
-            return herbivore_dist, carnivore_dist
+            herbivore_dist = np.zeros(self.landscape.shape, dtype=np.int64)
+            carnivore_dist = np.zeros(self.landscape.shape, dtype=np.int64)
+            for cell in self.cell_list:
+                herbivore_dist[cell.loc[0] - 1, cell.loc[1] - 1] = len(cell.herbivores)
+                carnivore_dist[cell.loc[0] - 1, cell.loc[1] - 1] = len(cell.carnivores)
+            return herbivore_dist.tolist(), carnivore_dist.tolist()
         except RuntimeError as err:
             raise RuntimeError('ERROR: Failed while getting distributions: {}'.format(err))
 
@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements an out-of-core variant of the columnar simulation engine for
+Rossumøya island. The columns of each species live in memory-mapped files in a scratch
+directory instead of in RAM, and every phase of the annual cycle streams over the store in
+chunks of **chunk_size** animals, telling the operating system after each chunk that its
+pages are no longer needed. Peak resident memory is then bounded by a few chunks and the
+largest cell segment, not by the number of animals.
+
+The files grow in whole chunks as animals are appended, dead animals are compacted in
+place, and sorting by cell is a streaming counting sort into a second set of files.
+Results equal those of *ColumnarIsland* with the same **chunk_size**.
+
+The engine is selected with ``BioSim(..., engine='mapped')``; the scratch directory is
+given with **scratch_dir**.
+"""
+
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+from .columnar import ColumnarIsland, PopulationStore, DEAD
+
+
+class MappedStore(PopulationStore):
+    """
+    Columnar storage of all animals of one species in memory-mapped files.
+
+    The column attributes (**age**, **weight**, ...) are arrays backed by the files and
+    are rebound whenever the number of animals or the capacity changes.
+
+    .. seealso::
+        - biosim.columnar.PopulationStore
+
+    Parameters
+    ----------
+    directory : str
+        Directory in which the temporary files of the store are created, or *None* for
+        the default temporary directory.
+    chunk_size : int
+        Number of animals processed at a time and by which the files grow.
+
+        |
+
+    Attributes
+    ----------
+    capacity
+        *int*: Number of animals the files can hold.
+
+        |
+
+    """
+
+    #: Data type of each column.
+    dtypes = {'age': np.float64, 'weight': np.float64, 'fitness': np.float64,
+              'flags': np.uint8, 'cell': np.int64}
+    chunk_size = 1 << 16
+
+    def __init__(self, species, n_cells, directory=None, chunk_size=None):
+        if chunk_size is not None:
+            if type(chunk_size) is not int or chunk_size < 1:
+                raise ValueError('chunk_size must be a positive integer')
+            self.chunk_size = chunk_size
+        super().__init__(species, n_cells)
+        self.directory = tempfile.TemporaryDirectory(prefix='biosim-', dir=directory)
+        self.size = 0
+        self.capacity = 0
+        self.maps = {}
+        self.generation = 0
+        self.reserve(self.chunk_size)
+
+    def __len__(self):
+        return self.size
+
+    def map_files(self, capacity, generation):
+        """
+        Returns arrays of **capacity** animals mapped to the files of **generation**,
+        creating or growing the files as needed.
+
+        |
+
+        """
+        maps = {}
+        for name, dtype in self.dtypes.items():
+            path = os.path.join(self.directory.name, '{}.{}'.format(name, generation))
+            size = capacity * np.dtype(dtype).itemsize
+            with open(path, 'a+b') as file:
+                if os.path.getsize(path) < size:
+                    file.truncate(size)
+                buffer = mmap.mmap(file.fileno(), size)
+            maps[name] = np.frombuffer(buffer, dtype=dtype)
+        return maps
+
+    def bind(self):
+        """
+        Rebind the column attributes to the first **size** animals of the files.
+
+        |
+
+        """
+        for name, array in self.maps.items():
+            setattr(self, name, array[:self.size])
+
+    def reserve(self, size):
+        """
+        Grow the files in whole chunks until they can hold **size** animals.
+
+        |
+
+        """
+        if size <= self.capacity:
+            return
+        self.capacity = -(-size // self.chunk_size) * self.chunk_size
+        self.maps = self.map_files(self.capacity, self.generation)
+        self.bind()
+
+    def release(self, start=0, stop=None, maps=None):
+        """
+        Tell the operating system that the pages holding animals **start** to **stop** of
+        the files are not needed for now. The data stays in the files.
+
+        |
+
+        """
+        if not hasattr(mmap, 'MADV_DONTNEED'):
+            return
+        stop = self.size if stop is None else stop
+        for array in (self.maps if maps is None else maps).values():
+            itemsize = array.itemsize
+            begin = start * itemsize // mmap.PAGESIZE * mmap.PAGESIZE
+            end = min(stop * itemsize, array.nbytes)
+            if end > begin:
+                array.base.obj.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+    def chunks(self):
+        """
+        Returns an iterator over consecutive slices of at most **chunk_size** animals.
+        The pages of each chunk are released once the next chunk is requested.
+
+        |
+
+        """
+        size = self.size
+        for start in range(0, size, self.chunk_size):
+            stop = min(start + self.chunk_size, size)
+            yield slice(start, stop)
+            self.release(start, stop)
+
+    def append(self, cell, age, weight):
+        """
+        Append animals to the files, growing them by whole chunks if needed.
+
+        .. seealso::
+            - PopulationStore.append()
+
+        |
+
+        """
+        age = np.asarray(age, dtype=np.float64)
+        start = self.size
+        self.reserve(start + len(age))
+        self.size = start + len(age)
+        self.bind()
+        new = slice(start, self.size)
+        self.age[new] = age
+        self.weight[new] = weight
+        self.fitness[new] = self.compute_fitness(age, self.weight[new])
+        self.flags[new] = 0
+        self.cell[new] = cell
+
+    def update_fitness(self, index=None):
+        """
+        Recompute fitness of all animals chunk by chunk, or only of the animals at
+        **index**.
+
+        |
+
+        """
+        if index is None:
+            for chunk in self.chunks():
+                super().update_fitness(chunk)
+        else:
+            super().update_fitness(index)
+
+    def take(self, index):
+        """
+        Keep only the animals selected by **index**, in the order given by **index**.
+        The selected animals are gathered in memory, so this is only meant for small
+        stores; the phases use **compact()** and **sort_by_cell()** instead.
+
+        |
+
+        """
+        values = {name: getattr(self, name)[index] for name in self.columns}
+        self.reserve(len(values['age']))
+        self.size = len(values['age'])
+        self.bind()
+        for name in self.columns:
+            getattr(self, name)[:] = values[name]
+
+    def compact(self, keep):
+        """
+        Keep only the animals where the boolean mask **keep** is *True*, moving them
+        forward in place chunk by chunk.
+
+        |
+
+        """
+        self.filter(lambda chunk: keep[chunk])
+
+    def remove_dead(self):
+        """
+        Remove the animals flagged **DEAD** in place, chunk by chunk.
+
+        |
+
+        """
+        self.filter(lambda chunk: (self.flags[chunk] & DEAD) == 0)
+
+    def filter(self, select):
+        """
+        Keep the animals for which **select**, called with each chunk, returns *True*.
+        Survivors only move towards the front, so a chunk is read before it is overwritten.
+
+        |
+
+        """
+        written = 0
+        for chunk in self.chunks():
+            keep = select(chunk)
+            kept = written + np.count_nonzero(keep)
+            for name in self.columns:
+                column = getattr(self, name)
+                column[written:kept] = column[chunk][keep]
+            self.release(written, kept)
+            written = kept
+        self.size = written
+        self.bind()
+        self.rebuild_offsets()
+
+    def sort_by_cell(self, last=0):
+        """
+        Sort the animals by cell (stable) with a streaming counting sort into a second
+        set of files, which then replaces the first.
+
+        .. seealso::
+            - PopulationStore.sort_by_cell()
+
+        |
+
+        """
+        n_keys = 2 * self.n_cells
+
+        def keys(chunk):
+            return 2 * self.cell[chunk] + ((self.flags[chunk] & last) != 0)
+
+        total = np.zeros(n_keys, dtype=np.int64)
+        for chunk in self.chunks():
+            total += np.bincount(keys(chunk), minlength=n_keys)
+        start = np.cumsum(total) - total
+        target = self.map_files(self.capacity, 1 - self.generation)
+        for chunk in self.chunks():
+            key = keys(chunk)
+            order = np.argsort(key, kind='stable')
+            key = key[order]
+            rank = np.arange(len(key)) - np.searchsorted(key, key)
+            destination = start[key] + rank
+            for name in self.columns:
+                target[name][destination] = getattr(self, name)[chunk][order]
+            target['flags'][destination] &= np.uint8(~last & 0xff)
+            written = np.bincount(key, minlength=n_keys)
+            for begin, count in zip(start[written > 0], written[written > 0]):
+                self.release(begin, begin + count, target)
+            start += written
+        self.maps = target
+        self.generation = 1 - self.generation
+        self.bind()
+        self.rebuild_offsets()
+
+    def counts(self):
+        """
+        Returns the number of animals in each cell, counted chunk by chunk.
+
+        |
+
+        """
+        counts = np.zeros(self.n_cells, dtype=np.int64)
+        for chunk in self.chunks():
+            counts += np.bincount(self.cell[chunk], minlength=self.n_cells)
+        return counts
+
+    def rebuild_offsets(self):
+        """
+        Rebuild the segment offsets of animals already sorted by cell.
+
+        |
+
+        """
+        self.offsets[1:] = np.cumsum(self.counts())
+
+
+class MappedIsland(ColumnarIsland):
+    """
+    Island model backed by one *MappedStore* per species.
+
+    The lists of annual fitness, age and weight values are only filled when the island is
+    visualized, since copying them would bring every animal back into memory.
+
+    Parameters
+    ----------
+    scratch_dir : str
+        Directory for the temporary files, or *None* for the default temporary directory.
+        The files are removed when the island is garbage collected.
+    chunk_size : int
+        Number of animals processed at a time, see *MappedStore*.
+
+    .. seealso::
+        - biosim.columnar.ColumnarIsland
+
+    |
+
+    """
+
+    store_class = MappedStore
+    lazy_stats = True
+
+    def __init__(self, geo, img_dir=None, img_name=None, img_fmt=None, seed=None,
+                 scratch_dir=None, chunk_size=None):
+        self.scratch_dir = scratch_dir
+        self.chunk_size = chunk_size
+        super().__init__(geo, img_dir=img_dir, img_name=img_name, img_fmt=img_fmt, seed=seed)
+
+    def new_store(self, species):
+        """
+        Returns an empty *MappedStore* for **species** in the scratch directory.
+
+        |
+
+        """
+        return self.store_class(species, len(self.habitable), self.scratch_dir,
+                                self.chunk_size)
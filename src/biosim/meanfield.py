@@ -0,0 +1,548 @@
+# -*- coding: utf-8 -*-
+
+"""
+This module implements a deterministic mean-field engine for Rossumøya island, meant for
+cheap pre-screening of parameter sets before full stochastic runs. Instead of individual
+animals, every habitable cell holds for each species and age the expected number of
+animals and the first two moments of their weight, and every phase of the annual cycle
+replaces the random draws of *Island* by their expected values.
+
+Within a cell and age the weights are assumed to be normally distributed, and all fitness
+dependent rates are averaged over that distribution with Gauss-Hermite quadrature, so that
+e.g. carnivores mostly kill the light herbivores. Results are expected counts, not counts
+of a typical run, and differ systematically from the stochastic engines where fluctuations
+matter, e.g. close to extinction.
+
+The engine is selected with ``BioSim(..., engine='meanfield')``.
+"""
+
+import functools
+
+import numpy as np
+
+from .columnar import ColumnarIsland
+
+
+@functools.lru_cache(maxsize=None)
+def hermite_nodes(n_nodes):
+    """
+    Returns the nodes and weights of Gauss-Hermite quadrature for the standard normal
+    distribution with **n_nodes** points.
+
+    |
+
+    """
+    x, w = np.polynomial.hermite_e.hermegauss(n_nodes)
+    return x, w / w.sum()
+
+
+class MomentStore:
+    """
+    Expected population of one species, by habitable cell and age. Each cell and age holds
+    the sums :math:`\\sum 1`, :math:`\\sum w` and :math:`\\sum w^2` over its animals, so
+    that populations are merged by adding the sums.
+
+    Parameters
+    ----------
+    species : class
+        Animal class (*Herbivore* or *Carnivore*) providing the species parameters.
+    n_cells : int
+        Number of habitable cells on the island.
+
+        |
+
+    Attributes
+    ----------
+    n
+        *ndarray*: Expected number of animals, shape ``(n_cells, n_ages)``.
+    weight_sum
+        *ndarray*: Sum of the weights of the animals, shape ``(n_cells, n_ages)``.
+    weight_sq_sum
+        *ndarray*: Sum of the squared weights of the animals, shape ``(n_cells, n_ages)``.
+
+        |
+
+    """
+
+    #: Maximum number of age classes, the last one holds all older animals.
+    max_ages = 100
+    #: Number of Gauss-Hermite nodes used to average over the weight distribution.
+    n_nodes = 5
+
+    def __init__(self, species, n_cells):
+        self.species = species
+        self.n_cells = n_cells
+        self.n = np.zeros((n_cells, 1))
+        self.weight_sum = np.zeros((n_cells, 1))
+        self.weight_sq_sum = np.zeros((n_cells, 1))
+
+    @property
+    def n_ages(self):
+        """
+        Number of age classes currently stored, one more than the oldest age present.
+
+        |
+
+        """
+        return self.n.shape[1]
+
+    def resize(self, n_ages):
+        """
+        Store **n_ages** age classes (at most **max_ages**), adding empty classes or
+        dropping the oldest ones, which must be empty.
+
+        |
+
+        """
+        n_ages = max(1, min(n_ages, self.max_ages))
+        if n_ages > self.n_ages:
+            pad = ((0, 0), (0, n_ages - self.n_ages))
+            self.n = np.pad(self.n, pad)
+            self.weight_sum = np.pad(self.weight_sum, pad)
+            self.weight_sq_sum = np.pad(self.weight_sq_sum, pad)
+        else:
+            self.n = self.n[:, :n_ages]
+            self.weight_sum = self.weight_sum[:, :n_ages]
+            self.weight_sq_sum = self.weight_sq_sum[:, :n_ages]
+
+    def trim(self):
+        """
+        Drop the empty age classes above the oldest age present.
+
+        |
+
+        """
+        occupied = np.flatnonzero(self.n.any(axis=0))
+        self.resize(occupied[-1] + 1 if len(occupied) > 0 else 1)
+
+    def __len__(self):
+        return int(round(self.n.sum()))
+
+    @property
+    def params(self):
+        """
+        Current *SpeciesParams* of the species.
+
+        |
+
+        """
+        return self.species.params
+
+    def add(self, index, n, weight_sum, weight_sq_sum):
+        """
+        Add animals given by their sums at **index**, a cell index array or a
+        ``(cell, age)`` tuple of index arrays.
+
+        |
+
+        """
+        np.add.at(self.n, index, n)
+        np.add.at(self.weight_sum, index, weight_sum)
+        np.add.at(self.weight_sq_sum, index, weight_sq_sum)
+
+    def remove(self, part):
+        """
+        Remove animals given by their sums, as returned by **select()**.
+
+        |
+
+        """
+        self.n -= part[0]
+        self.weight_sum -= part[1]
+        self.weight_sq_sum -= part[2]
+
+    def scale(self, factor):
+        """
+        Keep the share **factor** of the animals, with unchanged moments.
+
+        |
+
+        """
+        self.n *= factor
+        self.weight_sum *= factor
+        self.weight_sq_sum *= factor
+
+    def shift_weight(self, delta):
+        """
+        Change the weight of every animal by **delta**, broadcast over cells and ages.
+
+        |
+
+        """
+        self.weight_sq_sum += 2 * delta * self.weight_sum + self.n * delta ** 2
+        self.weight_sum += self.n * delta
+
+    def mean_weight(self):
+        """
+        Returns the mean weight of each cell and age, 0 where there are no animals.
+
+        |
+
+        """
+        return np.divide(self.weight_sum, self.n, out=np.zeros(self.n.shape), where=self.n > 0)
+
+    def nodes(self):
+        """
+        Returns the quadrature nodes of the weight distribution of each cell and age, with
+        shape ``(n_cells, n_ages, n_nodes)``, and the weights of the nodes.
+
+        |
+
+        """
+        x, w = hermite_nodes(self.n_nodes)
+        mean = self.mean_weight()
+        mean_sq = np.divide(self.weight_sq_sum, self.n, out=np.zeros(self.n.shape),
+                            where=self.n > 0)
+        std = np.sqrt(np.maximum(mean_sq - mean ** 2, 0.))
+        return mean[..., None] + std[..., None] * x, w
+
+    def node_fitness(self, weight):
+        """
+        Returns the fitness at the quadrature nodes **weight**.
+
+        |
+
+        """
+        age = np.arange(self.n_ages)[None, :, None]
+        return self.species.calculate_fitness_batch(np.broadcast_to(age, weight.shape), weight)
+
+    def select(self, share, weight, node_weights):
+        """
+        Returns the sums ``(n, weight, weight**2)`` of the part of the animals given by
+        **share**, the share selected at each quadrature node.
+
+        |
+
+        """
+        share = share * node_weights
+        return (self.n * share.sum(axis=-1), self.n * (share * weight).sum(axis=-1),
+                self.n * (share * weight ** 2).sum(axis=-1))
+
+    def fitness(self):
+        """
+        Returns the expected fitness of the animals of each cell and age.
+
+        .. seealso::
+            - biosim.animals.Animals.calculate_fitness_batch()
+
+        |
+
+        """
+        weight, node_weights = self.nodes()
+        return (self.node_fitness(weight) * node_weights).sum(axis=-1)
+
+    def grow_older(self):
+        """
+        Move all animals to the next age class and reduce their weight by *eta*.
+
+        |
+
+        """
+        keep = 1 - self.params.eta
+        self.resize(self.n_ages + 1)
+        for values, factor in ((self.n, 1), (self.weight_sum, keep),
+                               (self.weight_sq_sum, keep ** 2)):
+            if values.shape[1] > 1:
+                oldest = values[:, -1] + values[:, -2]
+                values[:, 1:-1] = values[:, :-2]
+                values[:, -1] = oldest
+                values[:, 0] = 0.
+            values *= factor
+
+    def counts(self):
+        """
+        Returns the expected number of animals in each cell.
+
+        |
+
+        """
+        return self.n.sum(axis=1)
+
+
+class MeanFieldIsland(ColumnarIsland):
+    """
+    Island model that follows the expected values of the annual cycle of *Island*.
+
+    Counts returned by **get_total_species_count()** are expected numbers of animals and
+    therefore floats. A species dies out once its expected number on the whole island
+    falls below **extinction_threshold**. The threshold is not applied per cell, since
+    the small expected numbers that migrate into neighbouring cells would then be
+    removed every year.
+
+    .. seealso::
+        - biosim.island.Island
+
+    |
+
+    """
+
+    store_class = MomentStore
+
+    #: Expected number of animals of a species below which it dies out on the island.
+    extinction_threshold = 0.5
+    #: Expected number of animals below which an age class of a cell is emptied.
+    negligible = 1e-6
+
+    def use_pool(self, enabled=True, max_size=None):
+        """
+        The mean-field engine keeps no animal objects, so there is nothing to pool.
+        Raises *ValueError* if **enabled** is *True*.
+
+        |
+
+        """
+        if enabled:
+            raise ValueError('The mean-field engine does not use animal pools')
+
+    def add_population(self, population):
+        """
+        Add population (herbivores and/or carnivores) to the cells on the island.
+
+        .. seealso::
+                - Island.add_population(population)
+
+        |
+
+        """
+        try:
+            for record in population:
+                loc = tuple(record['loc'])
+                if loc not in self.cell_index:
+                    raise ValueError('Cannot place animals at {}'.format(loc))
+                if any(x['species'] not in self.populations for x in record['pop']):
+                    raise KeyError('Invalid species. Valid keys are: Herbivore and Carnivore')
+                if any(x['age'] != int(x['age']) for x in record['pop']):
+                    raise ValueError('The mean-field engine follows whole-year age classes, '
+                                     'ages must be integers')
+                for x in record['pop']:
+                    store = self.populations[x['species']]
+                    age = min(int(x['age']), store.max_ages - 1)
+                    store.resize(max(store.n_ages, age + 1))
+                    store.add((self.cell_index[loc], age), 1., x['weight'], x['weight'] ** 2)
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed to add population in island: {}'.format(err))
+
+    def commence_annual_cycle(self):
+        """
+        Run the expected annual cycle in the same order as *Island*:
+            - Feeding
+            - Procreating
+            - Migration
+            - Aging
+            - Death
+
+        |
+
+        """
+        try:
+            self.reset_annual_stats()
+            self.herbivores_feed()
+            self.carnivores_feed()
+            stores = self.living_stores()
+            for store in stores:
+                self.animals_procreate(store)
+            for store in stores:
+                self.animals_migrate(store)
+                self.animals_age(store)
+                self.animals_death(store)
+            self.reset_fodder()
+        except RuntimeError as err:
+            raise RuntimeError('ERROR: Failed while commencing cycle: {}'.format(err))
+
+    def herbivores_feed(self):
+        """
+        The fodder of a cell is shared by its herbivores: each eats ``min(F, f / N)``.
+
+        .. seealso::
+            - biosim.animals.Herbivore.feeds()
+
+        |
+
+        """
+        store = self.populations['Herbivore']
+        p = store.params
+        n = store.counts()
+        intake = np.minimum(p.F, np.divide(self.fodder, n, out=np.zeros(store.n_cells),
+                                           where=n > 0))
+        self.fodder -= intake * n
+        store.shift_weight(p.beta * intake[:, None])
+
+    def carnivores_feed(self):
+        """
+        A carnivore kills a herbivore with probability *p* as in *Carnivore.feeds()*,
+        using the expected fitness of the carnivore's age class. Each carnivore tries the
+        herbivores left by the ones before, so a herbivore survives all *C* carnivores of
+        a class with probability :math:`(1 - p)^C`. The killed weight is shared among the
+        carnivore classes in proportion to their kill rates, and capped at *F* per
+        carnivore.
+
+        .. seealso::
+            - biosim.animals.Carnivore.feeds()
+
+        |
+
+        """
+        herbs = self.populations['Herbivore']
+        carns = self.populations['Carnivore']
+        p = carns.params
+        hunting = (herbs.counts() > 0) & (carns.counts() > 0)
+        if not np.any(hunting):
+            return
+        weight, node_weights = herbs.nodes()
+        prey_ages = np.flatnonzero(herbs.n[hunting].sum(axis=0) > 0)
+        prey_weight = weight[:, prey_ages]
+        herb_fitness = herbs.node_fitness(weight)[:, prey_ages]
+        carn_fitness = carns.fitness()
+        ages = np.flatnonzero(carns.n[hunting].sum(axis=0) > 0)
+        prob = np.clip((carn_fitness[:, ages, None, None] - herb_fitness[:, None]) *
+                       p.inv_delta_phi_max, 0, 1 - 1e-12)
+        rate = -carns.n[:, ages, None, None] * np.log1p(-prob)
+        total_rate = rate.sum(axis=1)
+        killed = np.where(hunting[:, None, None], 1 - np.exp(-total_rate), 0.)
+        killed_weight = herbs.n[:, prey_ages, None] * killed * node_weights * prey_weight
+        share = np.divide(rate, total_rate[:, None], out=np.zeros(rate.shape),
+                          where=total_rate[:, None] > 0)
+        eaten = np.zeros(carns.n.shape)
+        eaten[:, ages] = (killed_weight[:, None] * share).sum(axis=(2, 3))
+        eaten_each = np.divide(eaten, carns.n, out=np.zeros(eaten.shape), where=carns.n > 0)
+        capped = np.minimum(eaten_each, p.F)
+        factor = np.divide((capped * carns.n).sum(axis=1), eaten.sum(axis=1),
+                           out=np.zeros(carns.n_cells), where=eaten.sum(axis=1) > 0)
+        all_killed = np.zeros(weight.shape)
+        all_killed[:, prey_ages] = killed * factor[:, None, None]
+        herbs.remove(herbs.select(all_killed, weight, node_weights))
+        carns.shift_weight(p.beta * capped)
+
+    def animals_procreate(self, store):
+        """
+        Animals heavier than ``zeta * (w_birth + sigma_birth)`` give birth with
+        probability ``min(1, gamma * fitness * (N - 1))``, losing ``xi * w_birth``, and the
+        newborns join the cell with age 0 and weight ``w_birth`` (variance
+        ``sigma_birth**2``).
+
+        .. seealso::
+            - biosim.animals.Animals.procreation()
+
+        |
+
+        """
+        p = store.params
+        n_cell = store.counts()[:, None, None]
+        weight, node_weights = store.nodes()
+        prob = np.minimum(1, p.gamma * store.node_fitness(weight) * (n_cell - 1))
+        prob[(weight < p.birth_weight_threshold) | np.broadcast_to(n_cell <= 1, prob.shape)] = 0.
+        n, weight_sum, _ = store.select(prob, weight, node_weights)
+        loss = p.xi * p.w_birth
+        store.weight_sq_sum += n * loss ** 2 - 2 * loss * weight_sum
+        store.weight_sum -= n * loss
+        births = n.sum(axis=1)
+        store.n[:, 0] += births
+        store.weight_sum[:, 0] += births * p.w_birth
+        store.weight_sq_sum[:, 0] += births * (p.sigma_birth ** 2 + p.w_birth ** 2)
+
+    def animals_migrate(self, store):
+        """
+        The share ``mu * fitness`` of the animals of a cell leaves it, a quarter towards
+        each neighbour. Animals heading for water stay.
+
+        .. seealso::
+            - Island.animal_migrates()
+
+        |
+
+        """
+        land = self.neighbour_mask
+        weight, node_weights = store.nodes()
+        share = np.minimum(store.params.mu * store.node_fitness(weight), 1) / 4
+        part = store.select(share, weight, node_weights)
+        n_land = land.sum(axis=1)[:, None]
+        store.remove(tuple(values * n_land for values in part))
+        source = np.nonzero(land)[0]
+        store.add(self.neighbours[land], *[values[source] for values in part])
+
+    @staticmethod
+    def animals_age(store):
+        """
+        Increase the age of every animal by one year and reduce its weight by *eta*.
+
+        .. seealso::
+            - biosim.animals.Animals.commence_aging()
+
+        |
+
+        """
+        store.grow_older()
+
+    def animals_death(self, store):
+        """
+        The share ``omega * (1 - fitness)`` of the animals dies, all of those with no
+        weight. A species whose expected number on the island falls below
+        **extinction_threshold** dies out, and age classes below **negligible** are
+        emptied.
+
+        .. seealso::
+            - biosim.animals.Animals.death()
+
+        |
+
+        """
+        weight, node_weights = store.nodes()
+        dies = np.clip(store.params.omega * (1 - store.node_fitness(weight)), 0, 1)
+        dies[weight <= 0] = 1.
+        store.remove(store.select(dies, weight, node_weights))
+        if store.n.sum() < self.extinction_threshold:
+            store.scale(0.)
+        store.scale(np.where(store.n < self.negligible, 0., 1.))
+        store.trim()
+
+    def get_total_species_count(self):
+        """
+        Returns a dictionary with the expected counts of herbivores and carnivores on
+        the island.
+
+        |
+
+        """
+        return {name: float(store.n.sum()) for name, store in self.populations.items()}
+
+    def living_stores(self):
+        """
+        Returns the stores of the species with a nonzero expected number of animals.
+
+        .. seealso::
+            - biosim.columnar.ColumnarIsland.living_stores()
+
+        |
+
+        """
+        return [store for store in self.populations.values() if store.n.any()]
+
+    def get_total_animal_count(self):
+        """
+        Returns the expected total number of animals on the island.
+
+        |
+
+        """
+        return sum(self.get_total_species_count().values())
+
+    def update_visualization(self, year, total_years, animal_counts,
+                             cmax_animals, hist_specs, y_max):
+        """
+        Fill the histograms with the mean fitness, age and weight of each cell and age,
+        repeated for the expected number of animals, and update the graphics.
+
+        .. seealso::
+            - Island.update_visualization()
+
+        |
+
+        """
+        for name, store in self.populations.items():
+            repeats = np.round(store.n).astype(np.int64).ravel()
+            ages = np.broadcast_to(np.arange(store.n_ages), store.n.shape).ravel()
+            self.fitness_values[name] = np.repeat(store.fitness().ravel(), repeats)
+            self.weight_values[name] = np.repeat(store.mean_weight().ravel(), repeats)
+            self.age_values[name] = np.repeat(ages, repeats)
+        super().update_visualization(year, total_years, animal_counts,
+                                     cmax_animals, hist_specs, y_max)
@@ -5,7 +5,13 @@ This module implements the BioSim class that runs the complete simulation.
 
 """
 import random
+import numpy as np
 from .island import Island
+from .columnar import ColumnarIsland
+from .cohorts import CohortIsland
+from .meanfield import MeanFieldIsland
+from .batch import BatchIsland
+from .mapped import MappedIsland
 
 
 class BioSim:
@@ -51,6 +57,33 @@ class BioSim:
     log_file : str
         If given, write animal counts to this file
 
+    engine : str
+        Simulation engine, *'object'* (default) keeps one object per animal,
+        *'columnar'* keeps each species in NumPy arrays, *'cohort'* keeps groups of
+        identical animals as one entry with a count, *'meanfield'* follows the expected
+        values of the cycle and returns expected (float) counts, *'batch'* runs
+        **replicates** columnar simulations at once, *'mapped'* keeps the columns in
+        memory-mapped files in **scratch_dir** and streams over them in chunks.
+
+    pool : bool
+        If *True*, dead animals are recycled as newborns instead of allocating new
+        objects (object engine only). Results for a given seed are unchanged.
+        See **pool_stats**.
+
+    dispatch : bool or dict
+        If *True*, each cell is processed per animal or vectorized depending on its
+        number of animals (object engine only); a dict gives the thresholds, e.g.
+        ``{'upper': 100, 'lower': 60}``. See *Island.use_dispatch()* and
+        **dispatch_stats**.
+
+    replicates : int
+        Number of independent replicates run by the *'batch'* engine, replicate *r* with
+        seed ``seed + r``. **simulate()** then returns one count series per replicate.
+
+    scratch_dir : str
+        Directory for the temporary population files of the *'mapped'* engine. If None,
+        the default temporary directory is used.
+
 
     If **ymax_animals** is None, the y-axis limit should be adjusted automatically.
 
@@ -72,16 +105,24 @@ class BioSim:
     default_hist_specs = {'fitness': {'max': 1.0, 'delta': 0.05},
                           'age': {'max': 60.0, 'delta': 2},
                           'weight': {'max': 60, 'delta': 2}}
+    engines = {'object': Island,
+               'columnar': ColumnarIsland,
+               'cohort': CohortIsland,
+               'meanfield': MeanFieldIsland,
+               'batch': BatchIsland,
+               'mapped': MappedIsland}
 
     def __init__(self, island_map, ini_pop, seed,
                  vis_years=1, ymax_animals=None, cmax_animals=None, hist_specs=None,
                  img_dir=None, img_base=None, img_fmt='png', img_years=None,
-                 log_file=None):
+                 log_file=None, engine='object', pool=False, dispatch=False,
+                 replicates=None, scratch_dir=None):
 
         self.ini_pop = ini_pop
         self.seed = seed
         self.num_years = 0
         self.current_year = 0
+        self._early_stop = None
         self.vis_years = 1
         if cmax_animals is None:
             self.c_max_animal = self.default_cmax
@@ -93,7 +134,23 @@ class BioSim:
         else:
             self.hist_specs = hist_specs
 
-        self.island = Island(island_map, img_dir=img_dir, img_name=img_base, img_fmt=img_fmt)
+        if engine not in self.engines:
+            raise ValueError('Unknown engine: {}'.format(engine))
+        options = {}
+        if replicates is not None:
+            if engine != 'batch':
+                raise ValueError('replicates requires the batch engine')
+            options['replicates'] = replicates
+        if scratch_dir is not None:
+            if engine != 'mapped':
+                raise ValueError('scratch_dir requires the mapped engine')
+            options['scratch_dir'] = scratch_dir
+        self.island = self.engines[engine](island_map, img_dir=img_dir, img_name=img_base,
+                                           img_fmt=img_fmt, seed=seed, **options)
+        if pool:
+            self.island.use_pool()
+        if dispatch:
+            self.island.use_dispatch(**(dispatch if isinstance(dispatch, dict) else {}))
 
         if ini_pop is not None:
             self.add_population(ini_pop)
@@ -124,6 +181,9 @@ class BioSim:
         params : dict
             Dictionary with valid parameter specification for species
 
+        The parameters belong to this simulation only. Module-level defaults for new
+        simulations are set with *biosim.animals.set_animal_params()*.
+
 
         |
 
@@ -141,12 +201,15 @@ class BioSim:
         params :  dict
             Dictionary with valid parameter specification for landscape
 
+        The parameters belong to this simulation only. Module-level defaults for new
+        simulations are set with *biosim.cells.set_cell_params()*.
+
 
         |
         """
         self.island.update_cell_params(landscape, params)
 
-    def simulate(self, num_years):
+    def simulate(self, num_years, stop_tolerance=None, stop_window=50):
         """
         Run simulation while visualizing the result.
 
@@ -155,9 +218,38 @@ class BioSim:
         num_years : int
             Number of years to simulate
 
+        stop_tolerance : float
+            If given, stop early once the populations have settled, see
+            **is_steady()**, or once every animal has died.
+
+        stop_window : int
+            Number of years in each of the two windows compared by **is_steady()**.
+
+        Returns the yearly counts of herbivores and carnivores. With the *'batch'* engine
+        each of them is a list with one series per replicate.
+
+        Once no animal is left on the island the annual cycle is no longer run. Without
+        visualization the remaining years are then filled with zero counts at once.
+
+        If the simulation stops early, the returned series end with the year it stopped
+        and **early_stop** gives that year and the reason.
+
+        .. code-block:: python
+
+            sim = BioSim(island_map, ini_pop, seed=1, vis_years=0)
+            herbivores, carnivores = sim.simulate(5000, stop_tolerance=0.02)
+            if sim.early_stop is not None:
+                print(sim.early_stop['year'], sim.early_stop['reason'])
+
 
         |
         """
+        if stop_tolerance is not None:
+            if not isinstance(stop_tolerance, (int, float)) or stop_tolerance <= 0:
+                raise ValueError('stop_tolerance must be a positive number')
+            if type(stop_window) is not int or stop_window < 1:
+                raise ValueError('stop_window must be a positive integer')
+        self._early_stop = None
         if self.num_years == 0:
             self.num_years = num_years
         else:
@@ -170,10 +262,19 @@ class BioSim:
 
         herbivore_count = []
         carnivore_count = []
+        extinct = False
         for x in range(self.current_year, self.num_years):
             self.current_year = x + 1
-            self.island.commence_annual_cycle()
-            animal_counts = self.num_animals_per_species
+            if not extinct:
+                self.island.commence_annual_cycle()
+                animal_counts = self.num_animals_per_species
+                extinct = not any(np.any(count) for count in animal_counts.values())
+            elif self.vis_years == 0:
+                remaining = self.num_years - x
+                herbivore_count.extend([animal_counts['Herbivore']] * remaining)
+                carnivore_count.extend([animal_counts['Carnivore']] * remaining)
+                self.current_year = self.num_years
+                break
             if self.vis_years > 0 and self.current_year % self.vis_years == 0:
                 self.island.update_visualization(self.current_year, self.num_years,
                                                  animal_counts,
@@ -182,9 +283,54 @@ class BioSim:
 
             herbivore_count.append(animal_counts['Herbivore'])
             carnivore_count.append(animal_counts['Carnivore'])
-
+            if stop_tolerance is not None and self.current_year < self.num_years:
+                if extinct:
+                    reason = 'extinct'
+                elif (self.is_steady(herbivore_count, stop_window, stop_tolerance) and
+                      self.is_steady(carnivore_count, stop_window, stop_tolerance)):
+                    reason = 'steady state'
+                else:
+                    continue
+                self._early_stop = {'year': self.current_year, 'reason': reason}
+                self.num_years = self.current_year
+                break
+
+        if isinstance(self.island, BatchIsland):
+            return (np.array(herbivore_count).reshape(-1, self.island.replicates).T.tolist(),
+                    np.array(carnivore_count).reshape(-1, self.island.replicates).T.tolist())
         return herbivore_count, carnivore_count
 
+    @staticmethod
+    def is_steady(counts, window, tolerance):
+        """
+        Returns *True* if the mean and the standard deviation of the last **window**
+        counts differ from those of the **window** counts before by less than
+        **tolerance**, both relative to the earlier mean (at least 1). A stable
+        oscillation with a period shorter than the window is steady as well.
+
+        Parameters
+        ----------
+        counts : list
+            Yearly counts of one species, or arrays of counts of each replicate, in which
+            case every replicate must be steady.
+        window : int
+            Number of years in each window.
+        tolerance : float
+            Largest relative change counted as steady.
+
+
+        |
+
+        """
+        if len(counts) < 2 * window:
+            return False
+        counts = np.asarray(counts[-2 * window:], dtype=float)
+        before, after = counts[:window], counts[window:]
+        scale = np.maximum(before.mean(axis=0), 1.)
+        change = np.maximum(abs(after.mean(axis=0) - before.mean(axis=0)),
+                            abs(after.std(axis=0) - before.std(axis=0))) / scale
+        return bool(np.all(change < tolerance))
+
     def add_population(self, population):
         """
         Add population (herbivores and/or carnivores) to the cells on the island.
@@ -217,6 +363,19 @@ class BioSim:
         """
         return self.current_year
 
+    @property
+    def early_stop(self):
+        """
+        *None* if the last call of **simulate()** ran all its years, otherwise a dict with
+        the last simulated ``'year'`` and the ``'reason'`` for stopping, *'steady state'*
+        or *'extinct'*.
+
+
+        |
+
+        """
+        return self._early_stop
+
     @property
     def num_animals(self):
         """
@@ -239,6 +398,30 @@ class BioSim:
         """
         return self.island.get_total_species_count()
 
+    @property
+    def pool_stats(self):
+        """
+        Hit and miss counters of the animal pool of each species, as dictionary.
+        Empty if pooling is disabled.
+
+
+        |
+
+        """
+        return self.island.pool_stats()
+
+    @property
+    def dispatch_stats(self):
+        """
+        Number of cell-years processed with each cell strategy and number of strategy
+        switches, as dictionary. Empty if dispatch is disabled.
+
+
+        |
+
+        """
+        return self.island.dispatch_stats()
+
     def make_movie(self, movie_format=None):
         """
         Create MPEG4 movie from visualization images saved.
@@ -11,6 +11,18 @@ import math
 import pytest
 
 
+@pytest.fixture(autouse=True)
+def restore_animal_defaults():
+    """
+    Restore the module-level animal parameters changed by a test.
+    """
+    defaults = {species: dict(species.guideline_params) for species in (Herbivore, Carnivore)}
+    yield
+    for species, params in defaults.items():
+        species.guideline_params.update(params)
+        species.compile_params()
+
+
 def test_update_params():
     """
     Test that parameters of animals are updated correctly.
@@ -124,3 +136,221 @@ def test_carnivore_weight_change(mocker):
     for herbivore in herbivores:
         weight += carn.guideline_params["beta"] * herbivore.weight
     assert weight == carn.weight
+
+
+def test_carnivore_skips_fitter_herbivores(mocker):
+    """
+    Test that a carnivore draws no random number for herbivores it cannot kill, and that
+    with sorted fitness it only tries herbivores less fit than itself.
+    """
+    herbivores = sorted([Herbivore(5, w) for w in (2, 4, 60, 80)], key=lambda h: h.fitness)
+    carn = Carnivore(5, 8)
+    Carnivore.update_defaults({'F': 1000})
+    draw = mocker.patch('random.random', return_value=0)
+    try:
+        carn.feeds(herbivores[2:])
+        assert draw.call_count == 0
+        carn.feeds(herbivores, [h.fitness for h in herbivores])
+    finally:
+        Carnivore.update_defaults({'F': 50.0})
+    assert [h.dead for h in herbivores] == [True, True, False, False]
+    assert draw.call_count == 2
+
+
+def test_calculate_fitness_batch():
+    """
+    Test that batched fitness agrees with the fitness of single animals.
+    """
+    ages = [0, 5, 10, 40, 80]
+    weights = [1., 8., 20., 35., 3.]
+    fitness = Herbivore.calculate_fitness_batch(ages, weights)
+    expected = [Herbivore(age, weight).fitness for age, weight in zip(ages, weights)]
+    assert fitness == pytest.approx(expected, rel=1e-14)
+
+
+def test_calculate_fitness_batch_zero_weight():
+    """
+    Test that batched fitness is zero for animals without weight.
+    """
+    fitness = Carnivore.calculate_fitness_batch([3, 4], [0., -1.])
+    assert fitness.tolist() == [0., 0.]
+
+
+def test_calculate_fitness_batch_overflow():
+    """
+    Test that extreme ages give zero fitness instead of an overflow error.
+    """
+    fitness = Herbivore.calculate_fitness_batch([10000], [20.])
+    assert fitness.tolist() == [0.]
+
+
+def test_age_table_matches_exact():
+    """
+    Test that the age table equals the exact age factor.
+    """
+    for age in range(100):
+        exact = 1 / (1 + math.exp(Carnivore.guideline_params["phi_age"] *
+                                  (age - Carnivore.guideline_params["a_half"])))
+        assert Carnivore.age_factor(age) == exact
+
+
+def test_age_table_rebuilt_on_update():
+    """
+    Test that the age table is rebuilt when a_half changes.
+    """
+    a_half = Herbivore.guideline_params["a_half"]
+    before = Herbivore.age_factor(30)
+    try:
+        Herbivore.update_defaults({'a_half': 20.})
+        assert Herbivore.age_factor(30) < before
+    finally:
+        Herbivore.update_defaults({'a_half': a_half})
+    assert Herbivore.age_factor(30) == before
+
+
+def test_age_table_bounded_for_large_ages():
+    """
+    Test that a very large age gives fitness 0 without growing the age table beyond
+    the age where the age factor underflows.
+    """
+    fitness = Herbivore.calculate_fitness_batch([5, 10 ** 7], [20., 20.])
+    assert fitness[1] == 0.
+    assert Herbivore.age_factor(10 ** 9) == 0.
+    assert 64 <= len(Herbivore._age_table) <= Herbivore.age_table_limit()
+    last = Herbivore.age_table_limit() - 1
+    assert Herbivore.age_factor(last) == Herbivore.age_factor(last + 1000) == 0.
+
+
+@pytest.mark.parametrize('species', [Herbivore, Carnivore])
+def test_weight_table_error_bound(species):
+    """
+    Test that the interpolated weight factor stays within its error bound.
+    """
+    weights = [0.01 * w for w in range(1, 20000)]
+    exact = [1 / (1 + math.exp(-species.guideline_params["phi_weight"] *
+                               (w - species.guideline_params["w_half"]))) for w in weights]
+    species.set_weight_table(0.1)
+    try:
+        bound = species.weight_table_error_bound()
+        scalar = [species.weight_factor(w) for w in weights]
+        batch = species.calculate_fitness_batch([0] * len(weights), weights) \
+            / species.age_factor(0)
+    finally:
+        species.set_weight_table(None)
+    assert bound < 1e-4
+    assert max(abs(s - e) for s, e in zip(scalar, exact)) <= bound
+    assert max(abs(b - e) for b, e in zip(batch, exact)) <= bound * (1 + 1e-9)
+
+
+def test_set_weight_table_invalid_step():
+    """
+    Test that a non-positive table step raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        Herbivore.set_weight_table(0)
+
+
+def test_lazy_fitness_after_feeding():
+    """
+    Test that fitness read after feeding equals an eager recomputation.
+    """
+    animal = Herbivore(6, 12)
+    animal.feeds(50.)
+    eager = Herbivore(6, animal.weight)
+    eager.calculate_fitness()
+    assert animal.fitness == eager.fitness
+
+
+def test_lazy_fitness_not_recomputed_after_last_kill(mocker):
+    """
+    Test that a carnivore's fitness is only recomputed when it is read again.
+    """
+    herbivores = [Herbivore(1, 10) for _ in range(3)]
+    carn = Carnivore(10, 10)
+    old_f = Carnivore.guideline_params['F']
+    Carnivore.update_defaults({'F': 1000})
+    mocker.patch('random.random', return_value=0)
+    spy = mocker.spy(Carnivore, 'calculate_fitness')
+    try:
+        carn.feeds(herbivores)
+    finally:
+        Carnivore.update_defaults({'F': old_f})
+    assert all(herbivore.dead for herbivore in herbivores)
+    assert spy.call_count == 3
+    carn.fitness
+    assert spy.call_count == 4
+
+
+def test_animals_use_slots():
+    """
+    Test that animals have no per-instance __dict__.
+    """
+    assert not hasattr(Herbivore(1, 10), '__dict__')
+    assert not hasattr(Carnivore(1, 10), '__dict__')
+
+
+def test_packed_flags():
+    """
+    Test that the boolean attributes are stored in and read from the flags field.
+    """
+    animal = Herbivore(1, 10)
+    assert animal.flags == 0
+    animal.dead = True
+    animal.can_migrate = True
+    assert animal.flags == animals.DEAD | animals.CAN_MIGRATE
+    assert animal.dead is True and animal.can_migrate is True
+    animal.dead = False
+    assert animal.flags == animals.CAN_MIGRATE
+
+
+def test_compiled_params():
+    """
+    Test that the compiled parameters include the derived constants.
+    """
+    p = Carnivore.params
+    assert p.birth_weight_threshold == p.zeta * (p.w_birth + p.sigma_birth)
+    assert p.inv_delta_phi_max == 1 / p.DeltaPhiMax
+    assert Herbivore.params.inv_delta_phi_max is None
+
+
+def test_compiled_params_immutable_and_updated():
+    """
+    Test that compiled parameters cannot be changed directly but follow update_defaults.
+    """
+    with pytest.raises(AttributeError):
+        Herbivore.params.mu = 1.
+    old_mu = Herbivore.guideline_params['mu']
+    try:
+        Herbivore.update_defaults({'mu': 0.5})
+        assert Herbivore.params.mu == 0.5
+    finally:
+        Herbivore.update_defaults({'mu': old_mu})
+
+
+def test_pool_recycles_dead_animals():
+    """
+    Test that a pooled animal is reset like a new one and counted as a hit.
+    """
+    species = Herbivore.derive()
+    pool = animals.AnimalPool(species)
+    species.pool = pool
+    assert type(species.create(0, 8.)) is species
+    dead = species(30, 2.)
+    dead.flags = animals.DEAD | animals.CAN_MIGRATE
+    pool.release([dead])
+    baby = species.create(0, 8.)
+    assert baby is dead
+    assert (baby.age, baby.weight, baby.flags) == (0, 8., 0)
+    assert baby.fitness == species(0, 8.).fitness
+    assert pool.stats() == {'hits': 1, 'misses': 1, 'size': 0}
+
+
+def test_pool_max_size():
+    """
+    Test that the pool keeps at most max_size free animals.
+    """
+    pool = animals.AnimalPool(Herbivore, max_size=2)
+    pool.release([Herbivore(1, 1.) for _ in range(3)])
+    assert pool.stats()['size'] == 2
+    with pytest.raises(ValueError):
+        animals.AnimalPool(Herbivore, max_size=-1)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the replicate-batched engine of BioSim.
+"""
+
+import numpy as np
+import pytest
+
+from biosim.batch import BatchIsland
+from biosim.simulation import BioSim
+
+ISLAND = "WWWWW\nWLLHW\nWWLDW\nWWWWW"
+HERBIVORES = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                      for _ in range(40)]}]
+CARNIVORES = [{'loc': (2, 3), 'pop': [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                                      for _ in range(10)]}]
+
+
+def run(seed, years, **options):
+    """
+    Simulate the test island, adding carnivores half-way.
+    """
+    sim = BioSim(ISLAND, HERBIVORES, seed=seed, vis_years=0, **options)
+    herbivores, carnivores = sim.simulate(years)
+    sim.add_population(CARNIVORES)
+    more_herbivores, more_carnivores = sim.simulate(years)
+    if options.get('engine') == 'batch':
+        return ([a + b for a, b in zip(herbivores, more_herbivores)],
+                [a + b for a, b in zip(carnivores, more_carnivores)])
+    return herbivores + more_herbivores, carnivores + more_carnivores
+
+
+def test_replicates_equal_columnar_runs():
+    """
+    Test that replicate r reproduces the columnar engine seeded with seed + r.
+    """
+    herbivores, carnivores = run(7, 8, engine='batch', replicates=3)
+    assert len(herbivores) == len(carnivores) == 3
+    for r in range(3):
+        assert (herbivores[r], carnivores[r]) == run(7 + r, 8, engine='columnar')
+
+
+def test_counts_per_replicate():
+    """
+    Test that counts hold one entry per replicate.
+    """
+    island = BatchIsland(ISLAND, seed=1, replicates=4)
+    island.add_population(HERBIVORES + CARNIVORES)
+    assert island.get_total_species_count()['Herbivore'].tolist() == [40] * 4
+    assert island.get_total_animal_count().tolist() == [50] * 4
+    island.commence_annual_cycle()
+    assert island.get_total_animal_count().shape == (4,)
+
+
+@pytest.mark.parametrize('replicates', [0, -2, 1.5, '3'])
+def test_invalid_replicates(replicates):
+    """
+    Test that the number of replicates must be a positive integer.
+    """
+    with pytest.raises(ValueError):
+        BatchIsland(ISLAND, replicates=replicates)
+
+
+def test_replicates_need_batch_engine():
+    """
+    Test that replicates are rejected by the other engines.
+    """
+    with pytest.raises(ValueError):
+        BioSim(ISLAND, HERBIVORES, seed=1, vis_years=0, engine='columnar', replicates=2)
+
+
+def test_visualization_not_supported():
+    """
+    Test that the batch engine refuses to visualize.
+    """
+    sim = BioSim(ISLAND, HERBIVORES, seed=1, engine='batch', replicates=2)
+    with pytest.raises(ValueError):
+        sim.simulate(2)
+    assert np.all(sim.island.get_total_animal_count() == 40)
@@ -4,8 +4,12 @@
 Test set for Cells class for INF200 June 2021.
 """
 
+import random
+
+import numpy as np
 import pytest
 from biosim import cells
+from biosim.animals import Herbivore
 
 
 class TestCellClass:
@@ -83,6 +87,105 @@ class TestCellClass:
         assert len(self.lowland.herbivores) == len(herb)
         assert len(self.lowland.carnivores) == len(carn)
 
+    def test_vector_feeding_matches_object_feeding(self):
+        """
+        Test that herbivores gain the same weight with the vector strategy when fodder
+        runs out.
+        """
+        herb = [{'species': 'Herbivore', 'age': 1, 'weight': 10} for _ in range(5)]
+        other = cells.Lowland((6, 13))
+        for cell in (self.lowland, other):
+            cell.add_animal(herb)
+            cell.food_status = 25.
+        self.lowland.animals_feed()
+        other.animals_feed_vector(np.random.default_rng(1))
+        assert other.food_status == self.lowland.food_status == 0.
+        assert [h.weight for h in other.herbivores] == \
+            pytest.approx([h.weight for h in self.lowland.herbivores])
+        assert [h.fitness for h in other.herbivores] == \
+            pytest.approx([h.fitness for h in self.lowland.herbivores])
+
+    def test_vector_hunting_kills_until_full(self):
+        """
+        Test that with the vector strategy a carnivore certain to kill stops once it has
+        eaten F.
+        """
+        herb = [{'species': 'Herbivore', 'age': 80, 'weight': 20} for _ in range(5)]
+        carn = [{'species': 'Carnivore', 'age': 5, 'weight': 50}]
+        self.desert.add_animal(herb + carn)
+        carnivore = self.desert.species['Carnivore']
+        delta_phi_max = carnivore.params.DeltaPhiMax
+        try:
+            carnivore.update_defaults({'DeltaPhiMax': 1e-6})
+            self.desert.animals_feed_vector(np.random.default_rng(1))
+        finally:
+            carnivore.update_defaults({'DeltaPhiMax': delta_phi_max})
+        assert len(self.desert.herbivores) == 2
+        assert self.desert.carnivores[0].weight == pytest.approx(50 + 0.75 * 60)
+
+    def test_procreation_matches_animal_procreation(self):
+        """
+        Test that the batched births of a cell equal calling **procreation()** on each
+        animal with the same random numbers.
+        """
+        herb = [{'species': 'Herbivore', 'age': 5, 'weight': 10 + 4 * i} for i in range(10)]
+        species = Herbivore.derive(random.Random(3))
+        self.lowland.species = dict(self.lowland.species, Herbivore=species)
+        self.lowland.add_animal(herb)
+        babies, _ = self.lowland.animals_procreate(10, 0)
+        expected = Herbivore.derive(random.Random(3))
+        mothers = [expected(x['age'], x['weight']) for x in herb]
+        newborns = [mother.procreation(10) for mother in mothers]
+        assert 0 < len(babies) < 10
+        assert [b.weight for b in babies] == [b.weight for b in newborns if b is not None]
+        assert [h.weight for h in self.lowland.herbivores] == [m.weight for m in mothers]
+
+    def test_vector_aging_and_death(self):
+        """
+        Test that the vector strategy ages animals and removes those without weight.
+        """
+        herb = [{'species': 'Herbivore', 'age': 1, 'weight': 10} for _ in range(3)]
+        herb[0]['weight'] = 0.
+        self.lowland.add_animal(herb)
+        fitness, weight, age = \
+            self.lowland.animals_age_and_die_vector(np.random.default_rng(1))['Herbivore']
+        assert 0 < len(self.lowland.herbivores) < 3
+        assert [h.age for h in self.lowland.herbivores] == age.tolist() == \
+            [2] * len(self.lowland.herbivores)
+        assert weight.tolist() == pytest.approx([10 * 0.95] * len(self.lowland.herbivores))
+        assert fitness.tolist() == [h.fitness for h in self.lowland.herbivores]
+
+    def test_age_and_die_matches_separate_phases(self):
+        """
+        Test that the fused aging and death pass equals **animals_age()** followed by
+        **animals_death()** with the same random numbers, and returns the survivors' state.
+        """
+        herb = [{'species': 'Herbivore', 'age': 5, 'weight': 2 + 3 * i} for i in range(20)]
+        other = cells.Lowland((6, 13))
+        for cell in (self.lowland, other):
+            cell.species = dict(cell.species, Herbivore=Herbivore.derive(random.Random(5)))
+            cell.add_animal(herb)
+        self.lowland.animals_age()
+        self.lowland.animals_death()
+        fitness, weight, age = other.animals_age_and_die()['Herbivore']
+        expected = self.lowland.herbivores
+        assert 0 < len(expected) < 20
+        assert [(h.age, h.weight, h.fitness) for h in other.herbivores] == \
+            [(h.age, h.weight, h.fitness) for h in expected]
+        assert weight.tolist() == [h.weight for h in expected]
+        assert fitness.tolist() == [h.fitness for h in expected]
+        assert age.tolist() == [h.age for h in expected]
+
+    def test_age_and_die_keeps_non_integer_ages(self):
+        """
+        Test that the fused aging pass adds one year to non-integer ages.
+        """
+        self.lowland.add_animal([{'species': 'Herbivore', 'age': 2.5, 'weight': 30},
+                                 {'species': 'Herbivore', 'age': 4, 'weight': 30}])
+        self.lowland.animals_age_and_die_vector(np.random.default_rng(1))
+        assert [h.age for h in self.lowland.herbivores] == [3.5, 5]
+        assert type(self.lowland.herbivores[1].age) is int
+
     def test_add_animal_keys(self):
         """
         Test that error is raised in case of incompatible keys in add_animal.
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the cohort engine of BioSim.
+"""
+
+import numpy as np
+import pytest
+
+from biosim.animals import Herbivore
+from biosim.cohorts import CohortIsland, CohortStore
+from biosim.simulation import BioSim
+
+
+class TestCohortIsland:
+
+    @pytest.fixture(autouse=True)
+    def island_for_testing(self):
+        """
+        Initialize an island with two lowland cells and identical animals.
+        """
+        self.island = CohortIsland("WWWW\nWLLW\nWWWW", seed=1)
+        self.herbs = [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)]
+        self.carns = [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]
+        self.island.add_population([{'loc': (2, 3), 'pop': self.herbs + self.carns},
+                                    {'loc': (2, 2), 'pop': self.herbs}])
+
+    def test_identical_animals_form_cohorts(self):
+        """
+        Test that identical animals in a cell are stored as one cohort.
+        """
+        herbs = self.island.populations['Herbivore']
+        assert herbs.n_cohorts == 2
+        assert herbs.count.tolist() == [30, 30]
+        assert herbs.counts().tolist() == [30, 30]
+        assert self.island.get_total_species_count() == {'Herbivore': 60, 'Carnivore': 10}
+        assert self.island.get_total_animal_count() == 70
+
+    def test_feeding_splits_cohort(self):
+        """
+        Test that a cohort running out of fodder splits into fed, partly fed and hungry
+        animals.
+        """
+        self.island.fodder[:] = 25.
+        self.island.herbivores_feed()
+        herbs = self.island.populations['Herbivore']
+        assert self.island.fodder.tolist() == [0., 0.]
+        assert herbs.count.tolist() == [2, 1, 27] * 2
+        assert herbs.weight[:3] == pytest.approx([29., 24.5, 20.])
+
+    def test_hunting_kills_until_full(self):
+        """
+        Test that certain kills stop once the carnivore has eaten F.
+        """
+        self.island.update_animal_params('Carnivore', {'DeltaPhiMax': 1e-6, 'F': 40.})
+        carns = self.island.populations['Carnivore']
+        carns.weight[:] = 50.
+        carns.update_fitness()
+        self.island.carnivores_feed()
+        assert self.island.get_total_species_count()['Herbivore'] == 40
+        assert self.island.populations['Herbivore'].count.tolist() == [30, 10]
+        assert carns.count.tolist() == [1] * 10
+        assert carns.weight == pytest.approx([80.] * 10)
+
+    def test_annual_stats_collected_on_demand(self):
+        """
+        Test that annual statistics hold one value per animal once collected.
+        """
+        self.island.commence_annual_cycle()
+        counts = self.island.get_total_species_count()
+        self.island.collect_annual_stats()
+        assert len(self.island.fitness_values['Herbivore']) == counts['Herbivore']
+        assert len(self.island.age_values['Carnivore']) == counts['Carnivore']
+
+
+def test_store_merge_keeps_first_position():
+    """
+    Test that merging sums identical cohorts at the position of the first one.
+    """
+    store = CohortStore(Herbivore, 2)
+    store.append([0, 0, 1, 0], [3, 1, 3, 3], [10., 20., 10., 10.], [1, 2, 4, 0])
+    store.append([0], [1], [20.])
+    store.sort_by_cell()
+    store.merge()
+    assert store.age.tolist() == [3, 1, 3]
+    assert store.count.tolist() == [1, 3, 4]
+    assert store.offsets.tolist() == [0, 2, 3]
+    assert len(store) == 8
+    assert store.expand(store.age).tolist() == [3, 1, 1, 1, 3, 3, 3, 3]
+
+
+def test_biosim_cohort_engine():
+    """
+    Test that BioSim runs with the cohort engine and keeps far fewer cohorts than animals.
+    """
+    ini_pop = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                       for _ in range(2000)]}]
+    sim = BioSim("WWWW\nWDLW\nWWWW", ini_pop, seed=1, vis_years=0, engine='cohort')
+    herbivores, carnivores = sim.simulate(5)
+    assert carnivores == [0] * 5
+    assert sim.num_animals == herbivores[-1] > 0
+    assert sim.island.populations['Herbivore'].n_cohorts < herbivores[-1] / 5
+    assert np.all(sim.island.populations['Herbivore'].count > 0)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the columnar engine of BioSim.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from biosim.animals import Herbivore
+from biosim.columnar import ColumnarIsland, PopulationStore, MOVED
+from biosim.simulation import BioSim
+
+
+class TestColumnarIsland:
+
+    @pytest.fixture(autouse=True)
+    def island_for_testing(self):
+        """
+        Initialize an island with two lowland cells and a mixed population.
+        """
+        self.island = ColumnarIsland("WWWW\nWLLW\nWWWW", seed=1)
+        self.herbs = [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)]
+        self.carns = [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]
+        self.island.add_population([{'loc': (2, 3), 'pop': self.herbs + self.carns},
+                                    {'loc': (2, 2), 'pop': self.herbs}])
+
+    def test_only_habitable_cells_indexed(self):
+        """
+        Test that only land cells get a cell index.
+        """
+        assert self.island.cell_index == {(2, 2): 0, (2, 3): 1}
+
+    def test_neighbour_table(self):
+        """
+        Test that water neighbours are marked with -1.
+        """
+        assert self.island.neighbours.tolist() == [[-1, -1, -1, 1], [-1, -1, 0, -1]]
+
+    def test_migration_counts(self):
+        """
+        Test that migrants only head for land, that on average mu * fitness / 4 of a
+        group leave in each such direction, and that mu * fitness above 1 is allowed.
+        """
+        cell = np.zeros(2000, dtype=np.int64)
+        count = np.full(2000, 100)
+        moves = self.island.migration_counts(cell, count, np.full(2000, 0.4))
+        assert moves.shape == (2000, 4)
+        assert np.all(moves[:, :3] == 0)
+        assert moves[:, 3].mean() == pytest.approx(10, rel=0.02)
+        assert np.all(self.island.migration_counts(cell, count, np.zeros(2000)) == 0)
+        assert self.island.migration_counts(cell, count, np.full(2000, 1.5)).sum() > 0
+
+    def test_add_population_counts(self):
+        """
+        Test that animals are added to the right cells.
+        """
+        herbs = self.island.populations['Herbivore']
+        assert herbs.counts().tolist() == [30, 30]
+        assert herbs.offsets.tolist() == [0, 30, 60]
+        assert self.island.get_total_species_count() == {'Herbivore': 60, 'Carnivore': 10}
+        assert self.island.get_total_animal_count() == 70
+
+    def test_add_population_in_water(self):
+        """
+        Test that animals cannot be placed in water.
+        """
+        with pytest.raises(ValueError):
+            self.island.add_population([{'loc': (1, 1), 'pop': self.herbs}])
+
+    def test_add_population_wrong_species(self):
+        """
+        Test that an invalid species raises KeyError.
+        """
+        with pytest.raises(KeyError):
+            self.island.add_population([{'loc': (2, 2),
+                                         'pop': [{'species': 'Omnivore', 'age': 1,
+                                                  'weight': 5}]}])
+
+    def test_fitness_matches_animal(self):
+        """
+        Test that store fitness equals the fitness of an animal object.
+        """
+        herbs = self.island.populations['Herbivore']
+        assert herbs.fitness[0] == pytest.approx(Herbivore(5, 20).fitness)
+
+    def test_fodder_is_limited(self):
+        """
+        Test that herbivores cannot eat more fodder than available.
+        """
+        self.island.fodder[:] = 25.
+        weight_before = self.island.populations['Herbivore'].weight.copy()
+        self.island.herbivores_feed()
+        gained = self.island.populations['Herbivore'].weight - weight_before
+        assert self.island.fodder.tolist() == [0., 0.]
+        assert gained[:3] == pytest.approx([9., 9., 4.5])
+        assert np.all(gained[3:30] == 0)
+
+    def test_annual_cycle_stats(self):
+        """
+        Test that annual statistics describe every surviving animal.
+        """
+        self.island.commence_annual_cycle()
+        counts = self.island.get_total_species_count()
+        assert len(self.island.fitness_values['Herbivore']) == counts['Herbivore']
+        assert len(self.island.age_values['Carnivore']) == counts['Carnivore']
+        assert np.all(self.island.populations['Carnivore'].age >= 1)
+
+
+def test_store_compact_keeps_order():
+    """
+    Test that compaction keeps animals in order and rebuilds offsets.
+    """
+    store = PopulationStore(Herbivore, 3)
+    store.append([2, 0, 0], [1, 2, 3], [10., 20., 30.])
+    store.sort_by_cell()
+    assert store.age.tolist() == [2, 3, 1]
+    store.compact(np.array([True, False, True]))
+    assert store.age.tolist() == [2, 1]
+    assert store.offsets.tolist() == [0, 1, 1, 2]
+
+
+def test_store_sort_places_moved_animals_last():
+    """
+    Test that animals flagged MOVED follow the other animals of their cell and lose the flag.
+    """
+    store = PopulationStore(Herbivore, 2)
+    store.append([1, 0, 1, 0], [1, 2, 3, 4], [10., 20., 30., 40.])
+    store.flags[[0, 1]] |= MOVED
+    store.sort_by_cell(MOVED)
+    assert store.age.tolist() == [4, 2, 3, 1]
+    assert store.flags.tolist() == [0] * 4
+    assert store.offsets.tolist() == [0, 2, 4]
+
+
+def test_biosim_columnar_engine():
+    """
+    Test that BioSim runs with the columnar engine and returns one count per year.
+    """
+    ini_pop = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                       for _ in range(50)]}]
+    sim = BioSim("WWW\nWLW\nWWW", ini_pop, seed=1, vis_years=0, engine='columnar')
+    herbivores, carnivores = sim.simulate(20)
+    assert len(herbivores) == 20
+    assert carnivores == [0] * 20
+    assert sim.num_animals == herbivores[-1] > 50
+
+
+def test_biosim_unknown_engine():
+    """
+    Test that an unknown engine raises ValueError.
+    """
+    with pytest.raises(ValueError):
+        BioSim("WWW\nWLW\nWWW", [], seed=1, vis_years=0, engine='quantum')
+
+
+@pytest.mark.parametrize('engine', ['columnar', 'cohort', 'batch', 'mapped'])
+def test_non_integer_ages_are_kept(engine):
+    """
+    Test that the array engines keep non-integer ages and age them like the object engine.
+    """
+    island = BioSim("WWW\nWLW\nWWW", None, seed=1, vis_years=0, engine=engine).island
+    herbs = [{'species': 'Herbivore', 'age': age, 'weight': 20} for age in (2.5, 4)]
+    island.add_population([{'loc': (2, 2), 'pop': herbs}])
+    store = island.populations['Herbivore']
+    island.animals_age(store)
+    assert sorted(set(store.age.tolist())) == [3.5, 5.]
+    assert store.fitness[store.age == 5.] == pytest.approx(Herbivore(5, 20 * 0.95).fitness)
+
+
+def test_meanfield_rejects_non_integer_ages():
+    """
+    Test that the mean-field engine, which follows whole-year age classes, rejects
+    non-integer ages instead of truncating them.
+    """
+    herbs = [{'species': 'Herbivore', 'age': 2.5, 'weight': 20}]
+    with pytest.raises(ValueError):
+        BioSim("WWW\nWLW\nWWW", [{'loc': (2, 2), 'pop': herbs}], seed=1, vis_years=0,
+               engine='meanfield')
+
+
+@pytest.mark.parametrize('engine', ['columnar', 'cohort', 'mapped'])
+def test_clicked_cell_reports_store_counts(engine, tmp_path):
+    """
+    Test that clicking a cell on the map reports the animals of the engine's stores.
+    """
+    ini_pop = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 40}
+                                       for _ in range(5)]}]
+    sim = BioSim("WWW\nWLW\nWWW", ini_pop, seed=1, vis_years=1, img_dir=str(tmp_path),
+                 img_years=0, engine=engine)
+    sim.simulate(1)
+    graphics = sim.island.graphics
+    event = type('Event', (), {'inaxes': graphics.geography_ax, 'xdata': 1., 'ydata': 1.})
+    graphics.on_press(event)
+    count = sim.num_animals_per_species['Herbivore']
+    assert graphics.selected_cell_ax_txt.get_text().endswith(
+        'Herbivores:{}    Carnivores:0'.format(count))
+    assert count > 0
+    plt.close('all')
@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for Island class for INF200 June 2021.
+"""
+
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from biosim.animals import Herbivore
+from biosim.cells import Lowland
+from biosim.island import Island
+from biosim.simulation import BioSim
+
+
+def make_population(n_herbs=50, n_carns=0):
+    herbs = [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(n_herbs)]
+    carns = [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(n_carns)]
+    return [{'loc': (2, 2), 'pop': herbs + carns}]
+
+
+def test_only_habitable_cells_have_objects():
+    """
+    Test that water is kept in the landscape array only.
+    """
+    island = Island("WWWW\nWLHW\nWWDW\nWWWW")
+    assert [cell.loc for cell in island.cell_list] == [(2, 2), (2, 3), (3, 3)]
+    assert island.landscape.shape == (4, 4)
+    assert ''.join(island.landscape[2]) == 'WWDW'
+    assert island.map_rgb[0][0] == (0.0, 0.0, 1.0)
+    assert island.map_rgb[2][2] == island.landscapes['D'].rgb
+    assert island.get_distributions()[0] == [[0] * 4] * 4
+
+
+def test_grid_index_finds_cells():
+    """
+    Test that cells are looked up by location through the grid index.
+    """
+    island = Island("WWWW\nWLHW\nWWDW\nWWWW")
+    assert island.get_cell((2, 3)) is island.cell_list[1]
+    assert island.get_cell((3, 3)).loc == (3, 3)
+    assert island.get_cell((1, 1)) is None
+    assert island.get_cell((5, 2)) is None
+    assert island.get_cell((0, 0)) is None
+
+
+def test_neighbour_tables():
+    """
+    Test that the neighbour table indexes cell_list and masks water neighbours.
+    """
+    island = Island("WWWW\nWLHW\nWWDW\nWWWW")
+    assert island.cell_index == {(2, 2): 0, (2, 3): 1, (3, 3): 2}
+    assert island.neighbours.tolist() == [[-1, -1, -1, 1], [-1, 2, 0, -1], [1, -1, -1, -1]]
+    assert island.neighbour_mask.tolist() == (island.neighbours >= 0).tolist()
+    for index, cell in enumerate(island.cell_list):
+        expected = [island.get_cell(loc) for loc in cell.get_migration_possibilities()]
+        found = [island.cell_list[j] if ok else None
+                 for j, ok in zip(island.neighbours[index], island.neighbour_mask[index])]
+        assert found == expected
+
+
+def test_migration_moves_each_animal_once():
+    """
+    Test that staying animals keep their order and are followed by the arrivals, and that
+    animals arriving in a cell do not migrate again in the same year.
+    """
+    island = Island("WWWW\nWLLW\nWWWW", seed=3)
+    island.update_animal_params('Herbivore', {'mu': 10})
+    island.add_population([{'loc': (2, 2), 'pop': make_population(100)[0]['pop']},
+                           {'loc': (2, 3), 'pop': make_population(100)[0]['pop']}])
+    left, right = island.cell_list
+    origin = {id(animal): cell for cell in (left, right) for animal in cell.herbivores}
+    order = {id(animal): i for cell in (left, right) for i, animal in enumerate(cell.herbivores)}
+    island.animal_migrates(island.active_cells())
+    assert len(left.herbivores) + len(right.herbivores) == 200
+    assert 0 < len(left.herbivores) < 200
+    for cell in (left, right):
+        sources = [origin[id(animal)] is cell for animal in cell.herbivores]
+        assert sources == sorted(sources, reverse=True)
+        for kept in (True, False):
+            ranks = [order[id(a)] for a, s in zip(cell.herbivores, sources) if s is kept]
+            assert ranks == sorted(ranks)
+
+
+def test_animals_cannot_be_placed_in_water():
+    """
+    Test that adding animals to a water square raises ValueError.
+    """
+    island = Island("WWW\nWLW\nWWW")
+    with pytest.raises(ValueError):
+        island.add_population([{'loc': (1, 2), 'pop': [{'species': 'Herbivore', 'age': 5,
+                                                        'weight': 20}]}])
+
+
+def test_active_cells_follow_animals():
+    """
+    Test that only cells with animals are active, and that cells join the active set
+    when animals arrive and leave it once they are empty.
+    """
+    island = Island("WWWWW\nWLLLW\nWWWWW", seed=2)
+    island.update_animal_params('Herbivore', {'mu': 1.})
+    assert island.active == set()
+    island.add_population(make_population(n_herbs=20))
+    assert island.active_cells() == [island.cell_list[0]]
+    island.commence_annual_cycle()
+    assert island.active_cells() == island.cell_list[:2]
+    for cell in island.cell_list:
+        cell.herbivores = []
+    island.commence_annual_cycle()
+    assert island.active == set()
+
+
+def test_fodder_change_reaches_inactive_cells():
+    """
+    Test that a new f_max reaches cells that have not been fed on.
+    """
+    island = Island("WWWWW\nWLLLW\nWWWWW")
+    island.add_population(make_population(n_herbs=5))
+    island.update_cell_params('L', {'f_max': 50.})
+    island.commence_annual_cycle()
+    assert [cell.food_status for cell in island.cell_list] == [50.] * 3
+
+
+def test_island_grazing_matches_cell_feeding():
+    """
+    Test that island-wide grazing gives the weights, fitness and leftover fodder of
+    herbivores eating one by one, and that cells read their fodder from the island.
+    """
+    islands = [Island("WWWWW\nWLHLW\nWWWWW") for _ in range(2)]
+    for island in islands:
+        island.update_cell_params('H', {'f_max': 95.})
+        island.reset_fodder()
+        for cell, n in zip(island.cell_list, (90, 12, 0)):
+            cell.add_animal([{'species': 'Herbivore', 'age': a % 7, 'weight': 5. + a}
+                             for a in range(n)])
+    islands[0].herbivores_feed(islands[0].cell_list)
+    for cell in islands[1].cell_list:
+        cell.animals_feed()
+    for grazed, fed in zip(*[island.cell_list for island in islands]):
+        assert [(h.weight, h.fitness) for h in grazed.herbivores] == \
+            [(h.weight, h.fitness) for h in fed.herbivores]
+        assert grazed.food_status == fed.food_status
+    assert islands[0].fodder.tolist() == [0., 0., 800.]
+    islands[0].reset_fodder()
+    assert [cell.food_status for cell in islands[0].cell_list] == [800., 95., 800.]
+
+
+def test_grazing_matches_cell_feeding_for_non_integer_f():
+    """
+    Test that grazing leaves exactly the fodder of herbivores eating one by one when F
+    is not exactly representable, both island-wide and with the vector strategy.
+    """
+    islands = [Island("WWWWW\nWLHLW\nWWWWW") for _ in range(3)]
+    for island in islands:
+        island.update_animal_params('Herbivore', {'F': 10.1})
+        island.update_cell_params('H', {'f_max': 100.3})
+        island.reset_fodder()
+        for cell, n in zip(island.cell_list, (90, 6, 0)):
+            cell.add_animal([{'species': 'Herbivore', 'age': 5, 'weight': 5. + a}
+                             for a in range(n)])
+    islands[0].herbivores_feed(islands[0].cell_list)
+    for cell in islands[1].cell_list:
+        cell.animals_feed()
+    for cell in islands[2].cell_list:
+        cell.animals_feed_vector(np.random.default_rng(1))
+    assert islands[0].fodder.tolist() == islands[1].fodder.tolist() == \
+        islands[2].fodder.tolist()
+    assert islands[0].fodder[1] > 0
+    for grazed, fed, vector in zip(*[island.cell_list for island in islands]):
+        assert [h.weight for h in grazed.herbivores] == [h.weight for h in fed.herbivores] \
+            == [h.weight for h in vector.herbivores]
+
+
+def test_parameters_belong_to_island():
+    """
+    Test that changing parameters of one island leaves other islands and defaults unchanged.
+    """
+    island1 = Island("WWW\nWLW\nWWW")
+    island2 = Island("WWW\nWLW\nWWW")
+    island1.update_animal_params('Herbivore', {'zeta': 1.})
+    island1.update_cell_params('L', {'f_max': 100.})
+    assert island1.species['Herbivore'].params.zeta == 1.
+    assert island2.species['Herbivore'].params.zeta == Herbivore.params.zeta != 1.
+    assert island1.cell_list[0].f_max == 100.
+    assert island2.cell_list[0].f_max == Lowland.f_max != 100.
+
+
+def test_island_animals_use_island_species():
+    """
+    Test that animals added to an island are instances of that island's species.
+    """
+    island = Island("WWW\nWLW\nWWW")
+    island.add_population(make_population(n_herbs=1, n_carns=1))
+    cell = island.cell_list[0]
+    assert type(cell.herbivores[0]) is island.species['Herbivore']
+    assert type(cell.carnivores[0]) is island.species['Carnivore']
+    assert isinstance(cell.herbivores[0], Herbivore)
+
+
+def test_module_defaults_apply_to_new_islands():
+    """
+    Test that module-level defaults are copied by islands created afterwards.
+    """
+    f_max = Lowland.f_max
+    try:
+        Lowland.update_defaults({'f_max': 123.})
+        assert Island("WWW\nWLW\nWWW").cell_list[0].f_max == 123.
+    finally:
+        Lowland.update_defaults({'f_max': f_max})
+
+
+def test_simulations_in_threads_are_independent():
+    """
+    Test that differently configured simulations give the same results in threads as
+    when run one after the other.
+    """
+    def run(results, index, zeta):
+        sim = BioSim("WWWW\nWLHW\nWWWW", make_population(n_carns=10), seed=index, vis_years=0)
+        sim.set_animal_parameters('Herbivore', {'zeta': zeta})
+        results[index] = sim.simulate(30)
+
+    sequential = {}
+    for index, zeta in enumerate((2., 3.5, 5.)):
+        run(sequential, index, zeta)
+
+    threaded = {}
+    threads = [threading.Thread(target=run, args=(threaded, index, zeta))
+               for index, zeta in enumerate((2., 3.5, 5.))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert threaded == sequential
+
+
+def test_pool_does_not_change_results():
+    """
+    Test that recycling dead animals gives the same results and reports pool hits.
+    """
+    results = []
+    for pool in (False, True):
+        sim = BioSim("WWWW\nWLHW\nWWWW", make_population(n_carns=10), seed=4, vis_years=0,
+                     pool=pool)
+        counts = sim.simulate(30)
+        animals = [(a.age, a.weight, a.fitness) for cell in sim.island.cell_list
+                   for a in cell.herbivores + cell.carnivores]
+        results.append((counts, animals))
+    assert results[0] == results[1]
+    assert sim.pool_stats['Herbivore']['hits'] > 0
+    assert sim.pool_stats['Carnivore']['misses'] > 0
+
+
+def test_pool_disabled_by_default():
+    """
+    Test that no pool is used unless requested.
+    """
+    sim = BioSim("WWWW\nWLHW\nWWWW", make_population(), seed=4, vis_years=0)
+    assert sim.pool_stats == {}
+
+
+def test_dispatch_uses_thresholds_with_hysteresis():
+    """
+    Test that a cell switches to the vector strategy at the upper threshold and back only
+    below the lower one.
+    """
+    island = Island("WWW\nWLW\nWWW", seed=1)
+    island.use_dispatch(upper=50, lower=20)
+    island.add_population(make_population(n_herbs=49))
+    cell = island.cell_list[0]
+    island.select_strategies()
+    assert cell.strategy == 'object'
+    island.add_population(make_population(n_herbs=1))
+    island.select_strategies()
+    assert cell.strategy == 'vector'
+    cell.herbivores = cell.herbivores[:20]
+    island.select_strategies()
+    assert cell.strategy == 'vector'
+    cell.herbivores = cell.herbivores[:19]
+    island.select_strategies()
+    assert cell.strategy == 'object'
+    assert island.dispatch_stats() == {'object': 2, 'vector': 2, 'switches': 2}
+
+
+def test_dispatch_in_simulation():
+    """
+    Test that a simulation with dispatch runs both strategies and reproduces its results.
+    """
+    results = []
+    for _ in range(2):
+        sim = BioSim("WWWW\nWLDW\nWWWW", make_population(n_carns=10), seed=3, vis_years=0,
+                     dispatch={'upper': 60, 'lower': 30})
+        results.append(sim.simulate(20))
+    herbivores, carnivores = results[0]
+    assert results[0] == results[1]
+    assert herbivores[-1] > 0
+    assert sim.dispatch_stats['vector'] > 0
+    assert sim.dispatch_stats['object'] > 0
+    assert BioSim("WWW\nWLW\nWWW", None, seed=1, vis_years=0).dispatch_stats == {}
+
+
+def test_dispatch_disabled_returns_cells_to_object_strategy():
+    """
+    Test that disabling dispatch resets every cell to the object strategy.
+    """
+    island = Island("WWW\nWLW\nWWW")
+    island.add_population(make_population(n_herbs=1))
+    island.use_dispatch(upper=0, lower=0)
+    island.select_strategies()
+    assert island.cell_list[0].strategy == 'vector'
+    island.use_dispatch(False)
+    assert island.cell_list[0].strategy == 'object'
+    assert island.dispatch_stats() == {}
+
+
+@pytest.mark.parametrize('upper, lower', [(10, 20), (10, -1), (10., 5)])
+def test_dispatch_invalid_thresholds(upper, lower):
+    """
+    Test that invalid dispatch thresholds are rejected.
+    """
+    with pytest.raises(ValueError):
+        Island("WWW\nWLW\nWWW").use_dispatch(upper=upper, lower=lower)
+
+
+@pytest.mark.parametrize('engine', ['object', 'columnar', 'meanfield'])
+def test_extinct_island_fast_forwards(engine, monkeypatch):
+    """
+    Test that the annual cycle stops once every animal has died, and that the remaining
+    years get zero counts.
+    """
+    herbs = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 0}
+                                     for _ in range(10)]}]
+    sim = BioSim("WWW\nWDW\nWWW", herbs, seed=1, vis_years=0, engine=engine)
+    cycles = []
+    cycle = sim.island.commence_annual_cycle
+    monkeypatch.setattr(sim.island, 'commence_annual_cycle', lambda: cycles.append(cycle()))
+    herbivores, carnivores = sim.simulate(20)
+    assert len(cycles) == 1
+    assert herbivores == carnivores == [0] * 20
+    assert sim.year == 20
+    sim.add_population(make_population(n_herbs=5))
+    assert sim.simulate(1)[0][0] > 0
+
+
+def test_carnivore_phases_skipped_without_carnivores(monkeypatch):
+    """
+    Test that carnivores do not hunt when there are none on the island.
+    """
+    island = Island("WWW\nWLW\nWWW")
+    island.add_population(make_population())
+    called = []
+    monkeypatch.setattr(Lowland, 'carnivores_feed', lambda self: called.append(self))
+    island.commence_annual_cycle()
+    assert called == []
+    assert island.get_total_species_count()['Carnivore'] == 0
+
+
+def test_simulate_stops_at_steady_state():
+    """
+    Test that simulate stops once the counts have settled, returning the truncated
+    series and the year and reason for stopping.
+    """
+    sim = BioSim("WWWW\nWLLW\nWWWW", make_population(n_herbs=20), seed=1, vis_years=0)
+    herbivores, carnivores = sim.simulate(1000, stop_tolerance=0.1, stop_window=20)
+    assert sim.early_stop['reason'] == 'steady state'
+    assert len(herbivores) == len(carnivores) == sim.early_stop['year'] == sim.year < 1000
+    assert BioSim.is_steady(herbivores, 20, 0.1)
+    sim.simulate(5)
+    assert sim.early_stop is None
+    assert sim.year == sim.num_years
+
+
+def test_simulate_stops_at_extinction():
+    """
+    Test that simulate stops early when every animal has died.
+    """
+    herbs = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 0}]}]
+    sim = BioSim("WWW\nWDW\nWWW", herbs, seed=1, vis_years=0)
+    assert sim.simulate(50, stop_tolerance=0.1) == ([0], [0])
+    assert sim.early_stop == {'year': 1, 'reason': 'extinct'}
+
+
+def test_is_steady():
+    """
+    Test the windowed steady state criterion, including a stable oscillation.
+    """
+    assert BioSim.is_steady([100, 110] * 10, 4, 0.01)
+    assert not BioSim.is_steady(list(range(100, 120)), 4, 0.01)
+    assert not BioSim.is_steady([100] * 7, 4, 0.01)
+    assert BioSim.is_steady([0] * 8, 4, 0.01)
+
+
+@pytest.mark.parametrize('tolerance, window', [(0, 10), (-1., 10), (0.1, 0), (0.1, 2.)])
+def test_invalid_stop_criterion(tolerance, window):
+    """
+    Test that the stopping criterion must be positive.
+    """
+    sim = BioSim("WWW\nWLW\nWWW", make_population(), seed=1, vis_years=0)
+    with pytest.raises(ValueError):
+        sim.simulate(10, stop_tolerance=tolerance, stop_window=window)
+
+
+def test_counts_visit_active_cells_only():
+    """
+    Test that counts over the active cells equal counts over every cell, also after
+    animals have migrated.
+    """
+    island = Island("WWWWW\nWLLLW\nWLLLW\nWWWWW", seed=1)
+    island.add_population(make_population(n_herbs=50, n_carns=10))
+    for _ in range(5):
+        island.commence_annual_cycle()
+    counts = island.get_total_species_count()
+    assert counts == {'Herbivore': sum(len(c.herbivores) for c in island.cell_list),
+                      'Carnivore': sum(len(c.carnivores) for c in island.cell_list)}
+    assert island.get_total_animal_count() == sum(counts.values())
+    assert len(island.active) < len(island.cell_list)
+
+
+def test_animals_added_to_cell_are_active():
+    """
+    Test that animals added directly to a cell of the island are counted and take part
+    in the annual cycle.
+    """
+    island = Island("WWWW\nWLLW\nWWWW", seed=1)
+    island.get_cell((2, 3)).add_animal([{'species': 'Herbivore', 'age': 5, 'weight': 40}])
+    assert island.get_total_species_count() == {'Herbivore': 1, 'Carnivore': 0}
+    assert island.get_total_animal_count() == 1
+    random.seed(1)
+    island.commence_annual_cycle()
+    assert [h.age for c in island.cell_list for h in c.herbivores] == [6]
+    assert island.age_values['Herbivore'] == [6]
+
+
+def test_get_random_cell_draws_a_possibility():
+    """
+    Test that get_random_cell returns one of the migration possibilities of a cell,
+    drawn as in migration.
+    """
+    island = Island("WWWWW\nWLLLW\nWLLLW\nWWWWW", seed=1)
+    possibilities = island.get_cell((2, 3)).get_migration_possibilities()
+    draws = [island.get_random_cell(possibilities) for _ in range(100)]
+    generator = random.Random(1)
+    assert draws == [possibilities[generator.randint(0, 3)] for _ in range(100)]
+    assert set(draws) == set(possibilities)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the memory-mapped engine of BioSim.
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from biosim.animals import Herbivore
+from biosim.columnar import ColumnarIsland, PopulationStore, DEAD
+from biosim.mapped import MappedIsland, MappedStore
+from biosim.simulation import BioSim
+
+ISLAND = "WWWWW\nWLLHW\nWLDLW\nWWWWW"
+HERBIVORES = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                      for _ in range(50)]}]
+CARNIVORES = [{'loc': (2, 2), 'pop': [{'species': 'Carnivore', 'age': 5, 'weight': 20}
+                                      for _ in range(20)]}]
+
+
+class ChunkedStore(PopulationStore):
+    """In-memory store processed in the same chunks as the mapped test stores."""
+    chunk_size = 37
+
+
+class ChunkedIsland(ColumnarIsland):
+    store_class = ChunkedStore
+
+
+def run(island, years):
+    """
+    Simulate an island, adding carnivores after a third of the years.
+    """
+    island.add_population(HERBIVORES)
+    counts = []
+    for year in range(years):
+        if year == years // 3:
+            island.add_population(CARNIVORES)
+        island.commence_annual_cycle()
+        counts.append(island.get_total_species_count())
+    herbs = island.populations['Herbivore']
+    return counts, herbs.age.tolist(), herbs.weight.tolist(), herbs.offsets.tolist()
+
+
+def test_same_results_as_columnar_engine():
+    """
+    Test that the mapped engine reproduces the columnar engine processing the same chunks.
+    """
+    assert run(MappedIsland(ISLAND, seed=3, chunk_size=37), 30) == \
+        run(ChunkedIsland(ISLAND, seed=3), 30)
+
+
+def test_store_grows_in_chunks(tmp_path):
+    """
+    Test that the files grow by whole chunks and live in the scratch directory.
+    """
+    store = MappedStore(Herbivore, 2, str(tmp_path), chunk_size=8)
+    assert store.capacity == 8
+    store.append(np.zeros(10, dtype=int), np.arange(10), np.full(10, 20.))
+    assert store.capacity == 16
+    assert len(store) == 10
+    assert store.age.tolist() == list(range(10))
+    fitness = Herbivore.calculate_fitness_batch(store.age, store.weight)
+    assert store.fitness == pytest.approx(fitness)
+    assert len(os.listdir(store.directory.name)) == len(MappedStore.dtypes)
+
+
+def test_store_compacts_and_sorts_in_place(tmp_path):
+    """
+    Test that dead animals are removed in order and that sorting by cell is stable.
+    """
+    store = MappedStore(Herbivore, 3, str(tmp_path), chunk_size=4)
+    store.append([2, 0, 1, 0, 2, 1, 0, 2, 1, 0], np.arange(10), np.full(10, 20.))
+    store.flags[[1, 4, 8]] |= DEAD
+    store.remove_dead()
+    assert store.age.tolist() == [0, 2, 3, 5, 6, 7, 9]
+    store.sort_by_cell()
+    assert store.age.tolist() == [3, 6, 9, 2, 5, 0, 7]
+    assert store.offsets.tolist() == [0, 3, 5, 7]
+    assert store.counts().tolist() == [3, 2, 2]
+
+
+def test_invalid_chunk_size():
+    """
+    Test that the chunk size must be a positive integer.
+    """
+    with pytest.raises(ValueError):
+        MappedStore(Herbivore, 1, chunk_size=0)
+
+
+def test_biosim_mapped_engine(tmp_path):
+    """
+    Test that BioSim runs the mapped engine in the scratch directory and removes its files.
+    """
+    sim = BioSim(ISLAND, HERBIVORES, seed=1, vis_years=0, engine='mapped',
+                 scratch_dir=str(tmp_path))
+    herbivores, carnivores = sim.simulate(10)
+    assert sim.num_animals == herbivores[-1] > 0
+    assert len(os.listdir(tmp_path)) == 2
+    del sim
+    assert os.listdir(tmp_path) == []
+    with pytest.raises(ValueError):
+        BioSim(ISLAND, HERBIVORES, seed=1, vis_years=0, scratch_dir=str(tmp_path))
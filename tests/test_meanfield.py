@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+"""
+Test set for the mean-field engine of BioSim.
+"""
+
+import numpy as np
+import pytest
+
+from biosim.meanfield import MeanFieldIsland
+from biosim.simulation import BioSim
+
+
+class TestMeanFieldIsland:
+
+    @pytest.fixture(autouse=True)
+    def island_for_testing(self):
+        """
+        Initialize an island with two lowland cells and a mixed population.
+        """
+        self.island = MeanFieldIsland("WWWW\nWLLW\nWWWW")
+        self.herbs = [{'species': 'Herbivore', 'age': 5, 'weight': 20} for _ in range(30)]
+        self.carns = [{'species': 'Carnivore', 'age': 3, 'weight': 20} for _ in range(10)]
+        self.island.add_population([{'loc': (2, 3), 'pop': self.herbs + self.carns},
+                                    {'loc': (2, 2), 'pop': self.herbs}])
+
+    def test_add_population_by_age(self):
+        """
+        Test that animals are counted by cell and age.
+        """
+        herbs = self.island.populations['Herbivore']
+        assert herbs.n_ages == 6
+        assert herbs.n[:, 5].tolist() == [30., 30.]
+        assert herbs.mean_weight()[:, 5].tolist() == [20., 20.]
+        assert self.island.get_total_species_count() == {'Herbivore': 60., 'Carnivore': 10.}
+
+    def test_fodder_is_shared(self):
+        """
+        Test that herbivores share scarce fodder equally.
+        """
+        self.island.fodder[:] = 25.
+        self.island.herbivores_feed()
+        herbs = self.island.populations['Herbivore']
+        assert self.island.fodder == pytest.approx([0., 0.])
+        assert herbs.mean_weight()[:, 5] == pytest.approx([20 + 0.9 * 25 / 30] * 2)
+
+    def test_aging(self):
+        """
+        Test that aging moves animals to the next age class and reduces their weight.
+        """
+        carns = self.island.populations['Carnivore']
+        self.island.animals_age(carns)
+        assert carns.n[1, 4] == 10.
+        assert carns.n[1, 3] == 0.
+        assert carns.mean_weight()[1, 4] == pytest.approx(20 * (1 - carns.params.eta))
+
+    def test_migration_keeps_animals(self):
+        """
+        Test that migration moves animals between cells without losing any.
+        """
+        herbs = self.island.populations['Herbivore']
+        self.island.animals_migrate(herbs)
+        assert herbs.counts().sum() == pytest.approx(60.)
+        assert herbs.counts()[0] == pytest.approx(30.)
+
+    def test_extinction_threshold(self):
+        """
+        Test that a species dies out in a cell where its expected number is too small.
+        """
+        carns = self.island.populations['Carnivore']
+        carns.scale(0.04)
+        self.island.animals_death(carns)
+        assert carns.counts().tolist() == [0., 0.]
+        assert carns.n_ages == 1
+
+
+def test_biosim_meanfield_engine():
+    """
+    Test that BioSim returns float count series and that results do not depend on the seed.
+    """
+    ini_pop = [{'loc': (2, 2), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                       for _ in range(50)] +
+                [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(10)]}]
+    results = []
+    for seed in (1, 2):
+        sim = BioSim("WWWW\nWLHW\nWWWW", ini_pop, seed=seed, vis_years=0, engine='meanfield')
+        results.append(sim.simulate(20))
+    herbivores, carnivores = results[0]
+    assert results[0] == results[1]
+    assert len(herbivores) == len(carnivores) == 20
+    assert all(type(count) is float for count in herbivores)
+    assert np.all(np.array(herbivores) > 0)
+
+
+def test_carnivores_coexist_as_in_stochastic_engine():
+    """
+    Test that the long-run expected number of carnivores is close to the mean of
+    stochastic runs, and not lost to carnivores migrating into empty cells.
+    """
+    island = "WWWWWWW\nWLLLLLW\nWLLHLLW\nWLLLLLW\nWWWWWWW"
+    ini_pop = [{'loc': (3, 4), 'pop': [{'species': 'Herbivore', 'age': 5, 'weight': 20}
+                                       for _ in range(100)] +
+                [{'species': 'Carnivore', 'age': 5, 'weight': 20} for _ in range(20)]}]
+    expected = BioSim(island, ini_pop, seed=1, vis_years=0,
+                      engine='meanfield').simulate(50)[1][-10:]
+    stochastic = [BioSim(island, ini_pop, seed=seed, vis_years=0,
+                         engine='columnar').simulate(50)[1][-10:] for seed in range(3)]
+    assert np.mean(expected) == pytest.approx(np.mean(stochastic), rel=0.5)